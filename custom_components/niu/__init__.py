@@ -10,15 +10,22 @@ from homeassistant.config_entries import ConfigEntry
 from homeassistant.const import Platform
 from homeassistant.core import HomeAssistant
 from homeassistant.exceptions import ConfigEntryNotReady
+import homeassistant.helpers.config_validation as cv
 from homeassistant.helpers.device_registry import DeviceEntry
+from homeassistant.helpers.typing import ConfigType
 from homeassistant.helpers.update_coordinator import DataUpdateCoordinator
 
+from .account import async_acquire_account, async_release_account
+from .const import DOMAIN
 from .coordinator import NiuDataCoordinator
+from .export import async_setup_services
 
 _LOGGER = logging.getLogger(__name__)
 
 PLATFORMS: list[Platform] = [Platform.SENSOR]
 
+CONFIG_SCHEMA = cv.config_entry_only_config_schema(DOMAIN)
+
 type MyConfigEntry = ConfigEntry[RuntimeData]
 
 
@@ -29,18 +36,29 @@ class RuntimeData:
     coordinator: DataUpdateCoordinator
 
 
+async def async_setup(hass: HomeAssistant, config: ConfigType) -> bool:
+    """Set up the NIU services."""
+    async_setup_services(hass)
+    return True
+
+
 async def async_setup_entry(hass: HomeAssistant, config_entry: MyConfigEntry) -> bool:
     """Set up NIU integration from a config entry."""
 
     # Initialize the coordinator that manages data updates from the API
-    coordinator = NiuDataCoordinator(hass, config_entry)
+    account = async_acquire_account(hass, config_entry)
+    coordinator = NiuDataCoordinator(hass, config_entry, account)
 
     # Perform an initial data load from API
-    await coordinator.async_config_entry_first_refresh()
+    try:
+        await coordinator.async_config_entry_first_refresh()
 
-    # Test to see if API initialized correctly
-    if coordinator.last_update_success is False:
-        raise ConfigEntryNotReady
+        # Test to see if API initialized correctly
+        if coordinator.last_update_success is False:
+            raise ConfigEntryNotReady
+    except Exception:
+        await async_release_account(hass, config_entry)
+        raise
 
     # Initialize a listener for config flow options changes
     config_entry.async_on_unload(
@@ -70,4 +88,11 @@ async def async_remove_config_entry_device(
 
 async def async_unload_entry(hass: HomeAssistant, config_entry: MyConfigEntry) -> bool:
     """Unload a config entry."""
-    return await hass.config_entries.async_unload_platforms(config_entry, PLATFORMS)
+    # Abort requests in flight rather than waiting for their timeouts
+    config_entry.runtime_data.coordinator.async_cancel_inflight()
+    unload_ok = await hass.config_entries.async_unload_platforms(
+        config_entry, PLATFORMS
+    )
+    if unload_ok:
+        await async_release_account(hass, config_entry)
+    return unload_ok
@@ -0,0 +1,180 @@
+"""Account-level state shared by the NIU config entries of one account."""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from typing import Any
+
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import CONF_PASSWORD, CONF_USERNAME
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.aiohttp_client import async_create_clientsession
+
+from .api import NiuAPI, NiuAuthError, NiuConnectionError, NiuToken
+from .const import DATA_ACCOUNTS, DOMAIN
+from .ratelimit import async_get_rate_limiter
+from .storage import async_get_auth_store
+
+_LOGGER = logging.getLogger(__name__)
+
+# Refresh the access token when it has less than this many seconds left
+TOKEN_REFRESH_MARGIN = 3600
+
+
+class NiuAccount:
+    """One NIU account: its HTTP pool, access token and vehicle list.
+
+    Every config entry of the account shares this object, so the account
+    logs in once no matter how many scooters are configured, and a new token
+    is seen by all entries as soon as one of them obtains it.
+    """
+
+    def __init__(self, hass: HomeAssistant, username: str, password: str) -> None:
+        """Initialize the account."""
+        self._session = async_create_clientsession(hass, auto_cleanup=False)
+        self.api = NiuAPI(
+            username, password, self._session, async_get_rate_limiter(hass)
+        )
+        self.entry_ids: set[str] = set()
+        self._auth_store = async_get_auth_store(hass)
+        self._token: NiuToken | None = None
+        self._token_loaded = False
+        self._vehicles: list[dict[str, Any]] | None = None
+        self._lock = asyncio.Lock()
+        self._vehicles_lock = asyncio.Lock()
+        # Vehicle list positions whose cached serial number was checked
+        self._verified_sns: set[int] = set()
+
+    @property
+    def username(self) -> str:
+        """Return the account name."""
+        return self.api.username
+
+    async def async_get_token(self) -> str:
+        """Return a valid access token, logging in at most once at a time.
+
+        A token cached from an earlier run is reused until it gets close to
+        expiry; it is then refreshed, and only if that fails do we log in
+        with the password again.
+        """
+        async with self._lock:
+            if not self._token_loaded:
+                self._token = await self._auth_store.async_get_token(self.username)
+                self._token_loaded = True
+
+            now = time.time()
+            if (
+                self._token is not None
+                and self._token.expires_at - now > TOKEN_REFRESH_MARGIN
+            ):
+                return self._token.access_token
+
+            token = None
+            if (
+                self._token is not None
+                and self._token.refresh_token
+                and (self._token.refresh_expires_at or now + 1) > now
+            ):
+                try:
+                    token = await self.api.refresh_token(self._token.refresh_token)
+                except (NiuAuthError, NiuConnectionError) as err:
+                    _LOGGER.debug("Token refresh failed, logging in again: %s", err)
+            if token is None:
+                token = await self.api.login()
+
+            self._token = token
+            await self._auth_store.async_set_token(self.username, token)
+            return token.access_token
+
+    async def async_invalidate_token(self, access_token: str | None) -> None:
+        """Forget a rejected access token.
+
+        Entries that saw the same token rejected only cause one new login:
+        once the token has been replaced, later calls are ignored.
+        """
+        async with self._lock:
+            if self._token is None or self._token.access_token != access_token:
+                return
+            self._token = None
+            await self._auth_store.async_set_token(self.username, None)
+
+    async def async_reauthenticate(self, rejected: str | None) -> str:
+        """Replace a rejected access token and return the new one.
+
+        Every caller that saw the same token rejected gets the one new
+        token, so the account logs in once however many requests failed.
+        """
+        await self.async_invalidate_token(rejected)
+        return await self.async_get_token()
+
+    async def async_get_vehicles(self) -> list[dict[str, Any]]:
+        """Return the vehicles of the account, listing them once."""
+        async with self._vehicles_lock:
+            if self._vehicles is None:
+                token = await self.async_get_token()
+                vehicles = await self.api.get_vehicles_info(token)
+                self._vehicles = vehicles["data"]["items"]
+            return self._vehicles
+
+    async def async_get_sn(self, scooter_id: int) -> str:
+        """Return the serial number of the scooter at ``scooter_id``."""
+        sn = await self._auth_store.async_get_sn(self.username, scooter_id)
+        if sn is None:
+            sn = await self._async_resolve_sn(scooter_id)
+        return sn
+
+    async def async_verify_sn(self, scooter_id: int, sn: str) -> str:
+        """Check a cached serial number against the vehicle list.
+
+        Called when the API rejects requests for ``sn``: the account's
+        vehicles may have changed since the number was cached. Each
+        position is checked once per run. Returns the current serial number.
+        """
+        if scooter_id in self._verified_sns:
+            return sn
+        self._verified_sns.add(scooter_id)
+        return await self._async_resolve_sn(scooter_id)
+
+    async def _async_resolve_sn(self, scooter_id: int) -> str:
+        """Look up the serial number of a scooter and cache it."""
+        vehicles = await self.async_get_vehicles()
+        sn = vehicles[scooter_id]["sn_id"]
+        await self._auth_store.async_set_sn(self.username, scooter_id, sn)
+        return sn
+
+    async def async_close(self) -> None:
+        """Close the account's HTTP pool."""
+        await self._session.close()
+
+
+@callback
+def async_acquire_account(hass: HomeAssistant, entry: ConfigEntry) -> NiuAccount:
+    """Return the shared account of a config entry, creating it if needed."""
+    accounts: dict[str, NiuAccount] = hass.data.setdefault(DOMAIN, {}).setdefault(
+        DATA_ACCOUNTS, {}
+    )
+    username = entry.data[CONF_USERNAME]
+    account = accounts.get(username)
+    if account is None:
+        account = accounts[username] = NiuAccount(
+            hass, username, entry.data[CONF_PASSWORD]
+        )
+    else:
+        # A reconfigured entry may carry a newer password
+        account.api.password = entry.data[CONF_PASSWORD]
+    account.entry_ids.add(entry.entry_id)
+    return account
+
+
+async def async_release_account(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Drop a config entry from its account, closing it after the last one."""
+    accounts: dict[str, NiuAccount] = hass.data.get(DOMAIN, {}).get(DATA_ACCOUNTS, {})
+    account = accounts.get(entry.data[CONF_USERNAME])
+    if account is None:
+        return
+    account.entry_ids.discard(entry.entry_id)
+    if not account.entry_ids:
+        del accounts[account.username]
+        await account.async_close()
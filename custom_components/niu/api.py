@@ -1,11 +1,16 @@
 """API client for NIU integration."""
 
+import asyncio
+from collections.abc import AsyncIterator
+from dataclasses import asdict, dataclass
+from datetime import datetime
 import hashlib
 import json
 import logging
+import time
 from typing import Any
 
-import requests
+import aiohttp
 
 from .const import (
     ACCOUNT_BASE_URL,
@@ -15,11 +20,18 @@ from .const import (
     MOTOR_INDEX_API_URI,
     MOTOINFO_LIST_API_URI,
     MOTOINFO_ALL_API_URI,
+    REQUEST_TIMEOUT,
+    TRACK_DETAIL_API_URI,
     TRACK_LIST_API_URI,
+    TRACK_PAGE_SIZE,
 )
+from .ratelimit import NiuRateLimiter, rate_limit_key
 
 _LOGGER = logging.getLogger(__name__)
 
+APP_ID = "niu_ktdrr960"
+APP_USER_AGENT = "manager/4.6.48 (android; IN2020 11);lang=zh-CN;clientIdentifier=Domestic;timezone=Asia/Shanghai;model=IN2020;deviceName=IN2020;ostype=android"
+
 
 class NiuAuthError(Exception):
     """Exception raised for authentication errors."""
@@ -29,155 +41,272 @@ class NiuConnectionError(Exception):
     """Exception raised for connection errors."""
 
 
+class NiuApiError(NiuConnectionError):
+    """Exception raised when the API answers a request with an error status."""
+
+
+class NiuTransientError(NiuConnectionError):
+    """Exception raised for errors that may pass on a retry.
+
+    These are network errors, timeouts, rate limiting and server errors.
+    """
+
+
+@dataclass
+class NiuToken:
+    """Access token with its refresh material; times are Unix timestamps."""
+
+    access_token: str
+    expires_at: float
+    refresh_token: str | None = None
+    refresh_expires_at: float | None = None
+
+    @classmethod
+    def from_response(cls, token: dict[str, Any], now: float) -> "NiuToken":
+        """Build a token from the ``data.token`` object of a login response."""
+        return cls(
+            access_token=token["access_token"],
+            expires_at=_expiry(token.get("token_expires_in"), now),
+            refresh_token=token.get("refresh_token"),
+            refresh_expires_at=(
+                _expiry(token["refresh_token_expires_in"], now)
+                if token.get("refresh_token_expires_in")
+                else None
+            ),
+        )
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> "NiuToken":
+        """Restore a token saved with ``as_dict``."""
+        return cls(**data)
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the token as a JSON serializable dict."""
+        return asdict(self)
+
+
+def _expiry(value: Any, now: float) -> float:
+    """Turn an expiry field into a timestamp.
+
+    The account server sends either a Unix timestamp or a lifetime in
+    seconds; without one, the token is assumed to be valid for a day.
+    """
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        return now + 86400
+    return value if value > 1_000_000_000 else now + value
+
+
 class NiuAPI:
-    """NIU API client."""
+    """NIU API client.
 
-    def __init__(self, username: str, password: str):
+    All requests go through the given aiohttp session, so every client built
+    on the same session shares one keep-alive connection pool. With a rate
+    limiter, every request first waits for its share of the login or data
+    budget.
+    """
+
+    def __init__(
+        self,
+        username: str,
+        password: str,
+        session: aiohttp.ClientSession,
+        rate_limiter: NiuRateLimiter | None = None,
+    ):
         """Initialize the API client."""
         self.username = username
         self.password = password
+        self._session = session
+        self._rate_limiter = rate_limiter
+        self._timeout = aiohttp.ClientTimeout(total=REQUEST_TIMEOUT)
         self._token = None
 
-    def get_token(self) -> str:
+    async def _request(
+        self,
+        method: str,
+        url: str,
+        what: str,
+        *,
+        check_status: bool = True,
+        **kwargs: Any,
+    ) -> dict[str, Any]:
+        """Send a request and return the decoded JSON body."""
+        await self._async_throttle(login=False)
+        try:
+            async with self._session.request(
+                method, url, timeout=self._timeout, **kwargs
+            ) as response:
+                if response.status in (401, 403):
+                    raise NiuAuthError(f"Token rejected while getting {what}")
+                if response.status == 429 or response.status >= 500:
+                    raise NiuTransientError(
+                        f"Failed to get {what}: HTTP {response.status}"
+                    )
+                response.raise_for_status()
+                data = json.loads(await response.text())
+        except aiohttp.ClientResponseError as err:
+            raise NiuConnectionError(f"Failed to get {what}: {err}") from err
+        except (aiohttp.ClientError, asyncio.TimeoutError) as err:
+            raise NiuTransientError(f"Failed to get {what}: {err}") from err
+        except json.JSONDecodeError as err:
+            raise NiuConnectionError(f"Failed to parse {what} response: {err}") from err
+
+        if check_status and data.get("status") != 0:
+            raise NiuApiError(f"API error: {data.get('message', 'Unknown error')}")
+
+        return data
+
+    async def _async_throttle(self, *, login: bool) -> None:
+        """Wait for the shared login or data budget, if there is one."""
+        if self._rate_limiter is None:
+            return
+        bucket = self._rate_limiter.login if login else self._rate_limiter.data
+        await bucket.async_acquire(rate_limit_key.get() or self.username)
+
+    async def get_token(self) -> str:
         """Get authentication token."""
-        url = ACCOUNT_BASE_URL + LOGIN_URI
+        return (await self.login()).access_token
+
+    async def login(self) -> NiuToken:
+        """Log in with the account password."""
         md5 = hashlib.md5(self.password.encode("utf-8")).hexdigest()
-        data = {
-            "account": self.username,
-            "password": md5,
-            "grant_type": "password",
-            "scope": "base",
-            "app_id": "niu_ktdrr960",
-        }
-        
+        return await self._request_token(
+            {
+                "account": self.username,
+                "password": md5,
+                "grant_type": "password",
+                "scope": "base",
+                "app_id": APP_ID,
+            }
+        )
+
+    async def refresh_token(self, refresh_token: str) -> NiuToken:
+        """Exchange a refresh token for a new access token."""
+        return await self._request_token(
+            {
+                "refresh_token": refresh_token,
+                "grant_type": "refresh_token",
+                "scope": "base",
+                "app_id": APP_ID,
+            }
+        )
+
+    async def _request_token(self, data: dict[str, Any]) -> NiuToken:
+        """Request a token from the account server."""
+        url = ACCOUNT_BASE_URL + LOGIN_URI
+        await self._async_throttle(login=True)
+
         try:
-            response = requests.post(url, data=data, timeout=30)
-            response.raise_for_status()
-            data = json.loads(response.content.decode())
-            
+            async with self._session.post(
+                url, data=data, timeout=self._timeout
+            ) as response:
+                response.raise_for_status()
+                data = json.loads(await response.text())
+
             if "data" not in data or "token" not in data["data"]:
                 raise NiuAuthError("Invalid response format")
-                
-            self._token = data["data"]["token"]["access_token"]
-            return self._token
-            
-        except requests.exceptions.RequestException as err:
-            raise NiuConnectionError(f"Failed to connect to NIU API: {err}")
+
+            token = NiuToken.from_response(data["data"]["token"], time.time())
+            self._token = token.access_token
+            return token
+
+        except (aiohttp.ClientError, asyncio.TimeoutError) as err:
+            raise NiuTransientError(f"Failed to connect to NIU API: {err}") from err
         except (json.JSONDecodeError, KeyError) as err:
-            raise NiuAuthError(f"Failed to parse authentication response: {err}")
+            raise NiuAuthError(f"Failed to parse authentication response: {err}") from err
 
-    def get_vehicles_info(self, token: str) -> dict[str, Any]:
+    async def get_vehicles_info(self, token: str) -> dict[str, Any]:
         """Get vehicles information."""
-        url = API_BASE_URL + MOTOINFO_LIST_API_URI
-        headers = {"token": token}
-        
-        try:
-            response = requests.get(url, headers=headers, timeout=30)
-            response.raise_for_status()
-            return json.loads(response.content.decode())
-        except requests.exceptions.RequestException as err:
-            raise NiuConnectionError(f"Failed to get vehicles info: {err}")
-        except json.JSONDecodeError as err:
-            raise NiuConnectionError(f"Failed to parse vehicles response: {err}")
+        return await self._request(
+            "GET",
+            API_BASE_URL + MOTOINFO_LIST_API_URI,
+            "vehicles info",
+            check_status=False,
+            headers={"token": token},
+        )
 
-    def get_battery_info(self, sn: str, token: str) -> dict[str, Any]:
+    async def get_battery_info(self, sn: str, token: str) -> dict[str, Any]:
         """Get battery information."""
-        url = API_BASE_URL + MOTOR_BATTERY_API_URI
-        params = {"sn": sn}
-        headers = {
-            "token": token,
-            "user-agent": "manager/4.6.48 (android; IN2020 11);lang=zh-CN;clientIdentifier=Domestic;timezone=Asia/Shanghai;model=IN2020;deviceName=IN2020;ostype=android",
-        }
-        
-        try:
-            response = requests.get(url, headers=headers, params=params, timeout=30)
-            response.raise_for_status()
-            data = json.loads(response.content.decode())
-            
-            if data.get("status") != 0:
-                raise NiuConnectionError(f"API error: {data.get('message', 'Unknown error')}")
-                
-            return data
-        except requests.exceptions.RequestException as err:
-            raise NiuConnectionError(f"Failed to get battery info: {err}")
-        except json.JSONDecodeError as err:
-            raise NiuConnectionError(f"Failed to parse battery response: {err}")
+        return await self._request(
+            "GET",
+            API_BASE_URL + MOTOR_BATTERY_API_URI,
+            "battery info",
+            headers={"token": token, "user-agent": APP_USER_AGENT},
+            params={"sn": sn},
+        )
 
-    def get_motor_info(self, sn: str, token: str) -> dict[str, Any]:
+    async def get_motor_info(self, sn: str, token: str) -> dict[str, Any]:
         """Get motor information."""
-        url = API_BASE_URL + MOTOR_INDEX_API_URI
-        params = {"sn": sn}
-        headers = {
-            "token": token,
-            "user-agent": "manager/4.6.48 (android; IN2020 11);lang=zh-CN;clientIdentifier=Domestic;timezone=Asia/Shanghai;model=IN2020;deviceName=IN2020;ostype=android",
-        }
-        
-        try:
-            response = requests.get(url, headers=headers, params=params, timeout=30)
-            response.raise_for_status()
-            data = json.loads(response.content.decode())
-            
-            if data.get("status") != 0:
-                raise NiuConnectionError(f"API error: {data.get('message', 'Unknown error')}")
-                
-            return data
-        except requests.exceptions.RequestException as err:
-            raise NiuConnectionError(f"Failed to get motor info: {err}")
-        except json.JSONDecodeError as err:
-            raise NiuConnectionError(f"Failed to parse motor response: {err}")
+        return await self._request(
+            "GET",
+            API_BASE_URL + MOTOR_INDEX_API_URI,
+            "motor info",
+            headers={"token": token, "user-agent": APP_USER_AGENT},
+            params={"sn": sn},
+        )
 
-    def get_overall_info(self, sn: str, token: str) -> dict[str, Any]:
+    async def get_overall_info(self, sn: str, token: str) -> dict[str, Any]:
         """Get overall information."""
-        url = API_BASE_URL + MOTOINFO_ALL_API_URI
-        headers = {
-            "token": token,
-            "Accept-Language": "en-US",
-            "Content-Type": "application/json"
-        }
-        
-        try:
-            response = requests.post(
-                url, 
-                headers=headers, 
-                json={"sn": sn},
-                timeout=30
-            )
-            response.raise_for_status()
-            data = json.loads(response.content.decode())
-            
-            if data.get("status") != 0:
-                raise NiuConnectionError(f"API error: {data.get('message', 'Unknown error')}")
-                
-            return data
-        except requests.exceptions.RequestException as err:
-            raise NiuConnectionError(f"Failed to get overall info: {err}")
-        except json.JSONDecodeError as err:
-            raise NiuConnectionError(f"Failed to parse overall response: {err}")
-
-    def get_track_info(self, sn: str, token: str) -> dict[str, Any]:
-        """Get track information."""
-        url = API_BASE_URL + TRACK_LIST_API_URI
-        headers = {
-            "token": token,
-            "Accept-Language": "en-US",
-            "User-Agent": "manager/1.0.0 (identifier);clientIdentifier=identifier",
-        }
-        
-        try:
-            response = requests.post(
-                url,
-                headers=headers,
-                json={"index": "0", "pagesize": 10, "sn": sn},
-                timeout=30
-            )
-            response.raise_for_status()
-            data = json.loads(response.content.decode())
-            
-            if data.get("status") != 0:
-                raise NiuConnectionError(f"API error: {data.get('message', 'Unknown error')}")
-                
-            return data
-        except requests.exceptions.RequestException as err:
-            raise NiuConnectionError(f"Failed to get track info: {err}")
-        except json.JSONDecodeError as err:
-            raise NiuConnectionError(f"Failed to parse track response: {err}")
+        return await self._request(
+            "POST",
+            API_BASE_URL + MOTOINFO_ALL_API_URI,
+            "overall info",
+            headers={
+                "token": token,
+                "Accept-Language": "en-US",
+                "Content-Type": "application/json",
+            },
+            json={"sn": sn},
+        )
+
+    async def get_track_info(
+        self, sn: str, token: str, index: int = 0, pagesize: int = 10
+    ) -> dict[str, Any]:
+        """Get one page of the track list, newest tracks first."""
+        return await self._request(
+            "POST",
+            API_BASE_URL + TRACK_LIST_API_URI,
+            "track info",
+            headers={
+                "token": token,
+                "Accept-Language": "en-US",
+                "User-Agent": "manager/1.0.0 (identifier);clientIdentifier=identifier",
+            },
+            json={"index": str(index), "pagesize": pagesize, "sn": sn},
+        )
+
+    async def get_track_detail(
+        self, sn: str, token: str, track_id: str, start_time: int
+    ) -> dict[str, Any]:
+        """Get the GPS points of one track."""
+        return await self._request(
+            "POST",
+            API_BASE_URL + TRACK_DETAIL_API_URI,
+            "track detail",
+            headers={
+                "token": token,
+                "Accept-Language": "en-US",
+                "User-Agent": "manager/1.0.0 (identifier);clientIdentifier=identifier",
+            },
+            json={
+                "sn": sn,
+                "trackId": track_id,
+                "date": datetime.fromtimestamp(start_time / 1000).strftime("%Y%m%d"),
+            },
+        )
+
+    async def iter_track_pages(
+        self, sn: str, token: str, index: int = 0, pagesize: int = TRACK_PAGE_SIZE
+    ) -> AsyncIterator[dict[str, Any]]:
+        """Yield the track list page by page from ``index`` to the oldest track.
+
+        Pages are only requested as the caller consumes them, so a caller
+        that stops early does not download the rest of the history.
+        """
+        while True:
+            page = await self.get_track_info(sn, token, index, pagesize)
+            yield page
+            if len(page.get("data") or []) < pagesize:
+                return
+            index += 1
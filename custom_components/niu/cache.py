@@ -0,0 +1,72 @@
+"""Age and validity of the data a NIU vehicle holds per endpoint."""
+
+from __future__ import annotations
+
+from datetime import datetime, timedelta
+
+# Data past its TTL is still served for this many TTLs, but at least for
+# MIN_MAX_STALE, while it is revalidated
+MAX_STALE_FACTOR = 2
+MIN_MAX_STALE = timedelta(minutes=5)
+
+
+class EndpointCache:
+    """Fetch times and outcomes of a vehicle's endpoints.
+
+    An endpoint's data is fresh for its TTL, which is the endpoint's current
+    polling interval. After that it is stale: it keeps being served while
+    a new fetch runs, up to a bounded window past the TTL. Beyond that
+    window the data has expired and the entities reading it are
+    unavailable until a fetch succeeds.
+    """
+
+    def __init__(self, ttls: dict[str, timedelta]) -> None:
+        """Initialize the cache with a TTL per endpoint."""
+        self._ttls = dict(ttls)
+        self._fetched: dict[str, datetime] = {}
+        # Outcome of the most recent fetch of every endpoint
+        self._errors: dict[str, Exception | None] = {}
+
+    def set_ttl(self, endpoint: str, ttl: timedelta) -> None:
+        """Change how long an endpoint's data stays fresh."""
+        self._ttls[endpoint] = ttl
+
+    def record(self, endpoint: str, now: datetime) -> None:
+        """Record a successful fetch."""
+        self._fetched[endpoint] = now
+        self._errors[endpoint] = None
+
+    def record_error(self, endpoint: str, err: Exception) -> None:
+        """Record a failed fetch; the data of the last success is kept."""
+        self._errors[endpoint] = err
+
+    def error(self, endpoint: str) -> Exception | None:
+        """Return the error of the most recent fetch, if it failed."""
+        return self._errors.get(endpoint)
+
+    def ttl(self, endpoint: str) -> timedelta:
+        """Return how long an endpoint's data stays fresh."""
+        return self._ttls[endpoint]
+
+    def max_stale(self, endpoint: str) -> timedelta:
+        """Return how long an endpoint's data is served past its TTL."""
+        return max(self._ttls[endpoint] * MAX_STALE_FACTOR, MIN_MAX_STALE)
+
+    def age(self, endpoint: str, now: datetime) -> timedelta | None:
+        """Return the age of an endpoint's data, or None if never fetched."""
+        fetched = self._fetched.get(endpoint)
+        if fetched is None:
+            return None
+        return now - fetched
+
+    def is_fresh(self, endpoint: str, now: datetime) -> bool:
+        """Return whether an endpoint's data is within its TTL."""
+        age = self.age(endpoint, now)
+        return age is not None and age <= self._ttls[endpoint]
+
+    def is_servable(self, endpoint: str, now: datetime) -> bool:
+        """Return whether an endpoint's data may still be shown."""
+        age = self.age(endpoint, now)
+        return age is not None and age <= self._ttls[endpoint] + self.max_stale(
+            endpoint
+        )
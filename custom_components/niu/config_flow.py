@@ -18,16 +18,34 @@ from homeassistant.core import HomeAssistant, callback
 from homeassistant.exceptions import HomeAssistantError
 import homeassistant.helpers.config_validation as cv
 from homeassistant.helpers import selector
+from homeassistant.helpers.aiohttp_client import async_get_clientsession
 
 from .const import (
+    CONF_ACTIVE_INTERVAL,
+    CONF_ALL_SCOOTERS,
+    CONF_MAX_CONCURRENCY,
     CONF_MONITORED_VARIABLES,
+    CONF_PARKED_INTERVAL,
+    CONF_RIDE_STATISTICS,
     CONF_SCOOTER_ID,
+    CONF_STAGGER_REFRESH,
+    CONF_TRACK_POINTS,
+    CONF_TRACK_TOLERANCE,
+    DEFAULT_ACTIVE_INTERVAL,
+    DEFAULT_MAX_CONCURRENCY,
     DEFAULT_MONITORED_VARIABLES,
+    DEFAULT_PARKED_INTERVAL,
+    DEFAULT_RIDE_STATISTICS,
     DEFAULT_SCOOTER_ID,
+    DEFAULT_STAGGER_REFRESH,
+    DEFAULT_TRACK_POINTS,
+    DEFAULT_TRACK_TOLERANCE,
     DOMAIN,
     AVAILABLE_SENSORS,
+    ENDPOINT_INTERVALS,
 )
 from .api import NiuAPI, NiuAuthError, NiuConnectionError
+from .ratelimit import async_get_rate_limiter
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -36,6 +54,7 @@ STEP_USER_DATA_SCHEMA = vol.Schema(
         vol.Required(CONF_USERNAME): str,
         vol.Required(CONF_PASSWORD): str,
         vol.Optional(CONF_SCOOTER_ID, default=DEFAULT_SCOOTER_ID): int,
+        vol.Optional(CONF_ALL_SCOOTERS, default=False): bool,
     }
 )
 
@@ -57,19 +76,34 @@ STEP_SENSORS_DATA_SCHEMA = vol.Schema(
 
 async def validate_input(hass: HomeAssistant, data: dict[str, Any]) -> dict[str, Any]:
     """Validate the user input allows us to connect."""
-    api = NiuAPI(data[CONF_USERNAME], data[CONF_PASSWORD])
-    
+    api = NiuAPI(
+        data[CONF_USERNAME],
+        data[CONF_PASSWORD],
+        async_get_clientsession(hass),
+        async_get_rate_limiter(hass),
+    )
+
     try:
         # Test authentication
-        token = await hass.async_add_executor_job(api.get_token)
+        token = await api.get_token()
         if not token:
             raise NiuAuthError("Failed to get authentication token")
         
         # Get vehicles list
-        vehicles = await hass.async_add_executor_job(api.get_vehicles_info, token)
+        vehicles = await api.get_vehicles_info(token)
         if not vehicles or "data" not in vehicles or "items" not in vehicles["data"]:
             raise NiuConnectionError("Failed to get vehicles information")
         
+        if data.get(CONF_ALL_SCOOTERS):
+            if not vehicles["data"]["items"]:
+                raise NiuConnectionError("No scooters found on this account")
+            return {
+                "title": f"NIU Scooters - {data[CONF_USERNAME]}",
+                "token": token,
+                "scooter_id": data.get(CONF_SCOOTER_ID, DEFAULT_SCOOTER_ID),
+                "unique_id": f"niu_account_{data[CONF_USERNAME]}",
+            }
+
         scooter_id = data.get(CONF_SCOOTER_ID, DEFAULT_SCOOTER_ID)
         if scooter_id >= len(vehicles["data"]["items"]):
             raise NiuConnectionError(f"Scooter ID {scooter_id} is out of range")
@@ -82,6 +116,7 @@ async def validate_input(hass: HomeAssistant, data: dict[str, Any]) -> dict[str,
             "scooter_id": scooter_id,
             "scooter_name": scooter_name,
             "sn_id": vehicles["data"]["items"][scooter_id]["sn_id"],
+            "unique_id": f"niu_scooter_{vehicles['data']['items'][scooter_id]['sn_id']}",
         }
         
     except NiuAuthError as err:
@@ -145,9 +180,9 @@ class NiuConfigFlow(ConfigFlow, domain=DOMAIN):
                 if invalid_sensors:
                     errors["base"] = "invalid_sensors"
                 else:
-                    # Create unique ID based on scooter SN
-                    unique_id = f"niu_scooter_{self._input_data['sn_id']}"
-                    await self.async_set_unique_id(unique_id)
+                    # Create unique ID based on scooter SN, or on the
+                    # account when it polls every scooter
+                    await self.async_set_unique_id(self._input_data["unique_id"])
                     self._abort_if_unique_id_configured()
 
                     # Create the config entry
@@ -155,6 +190,7 @@ class NiuConfigFlow(ConfigFlow, domain=DOMAIN):
                         CONF_USERNAME: self._input_data[CONF_USERNAME],
                         CONF_PASSWORD: self._input_data[CONF_PASSWORD],
                         CONF_SCOOTER_ID: self._input_data[CONF_SCOOTER_ID],
+                        CONF_ALL_SCOOTERS: self._input_data.get(CONF_ALL_SCOOTERS, False),
                         CONF_MONITORED_VARIABLES: monitored_variables,
                     }
 
@@ -179,6 +215,9 @@ class NiuConfigFlow(ConfigFlow, domain=DOMAIN):
             try:
                 # Keep the same scooter_id
                 user_input[CONF_SCOOTER_ID] = config_entry.data[CONF_SCOOTER_ID]
+                user_input[CONF_ALL_SCOOTERS] = config_entry.data.get(
+                    CONF_ALL_SCOOTERS, False
+                )
                 
                 await validate_input(self.hass, user_input)
                 self._input_data = {**user_input, **config_entry.data}
@@ -233,6 +272,12 @@ class NiuConfigFlow(ConfigFlow, domain=DOMAIN):
                             CONF_PASSWORD: self._input_data[CONF_PASSWORD],
                             CONF_MONITORED_VARIABLES: monitored_variables,
                         },
+                        # The options flow selection takes precedence, so
+                        # keep it in step
+                        options={
+                            **config_entry.options,
+                            CONF_MONITORED_VARIABLES: monitored_variables,
+                        },
                         reason="reconfigure_successful",
                     )
 
@@ -242,8 +287,11 @@ class NiuConfigFlow(ConfigFlow, domain=DOMAIN):
                 {
                     vol.Optional(
                         CONF_MONITORED_VARIABLES,
-                        default=config_entry.data.get(
-                            CONF_MONITORED_VARIABLES, DEFAULT_MONITORED_VARIABLES
+                        default=config_entry.options.get(
+                            CONF_MONITORED_VARIABLES,
+                            config_entry.data.get(
+                                CONF_MONITORED_VARIABLES, DEFAULT_MONITORED_VARIABLES
+                            ),
                         ),
                     ): selector.SelectSelector(
                         selector.SelectSelectorConfig(
@@ -289,8 +337,11 @@ class NiuOptionsFlowHandler(OptionsFlow):
             {
                 vol.Optional(
                     CONF_MONITORED_VARIABLES,
-                    default=self.config_entry.data.get(
-                        CONF_MONITORED_VARIABLES, DEFAULT_MONITORED_VARIABLES
+                    default=self.options.get(
+                        CONF_MONITORED_VARIABLES,
+                        self.config_entry.data.get(
+                            CONF_MONITORED_VARIABLES, DEFAULT_MONITORED_VARIABLES
+                        ),
                     ),
                 ): selector.SelectSelector(
                     selector.SelectSelectorConfig(
@@ -299,6 +350,52 @@ class NiuOptionsFlowHandler(OptionsFlow):
                         mode=selector.SelectSelectorMode.DROPDOWN
                     )
                 ),
+                vol.Optional(
+                    CONF_MAX_CONCURRENCY,
+                    default=self.options.get(
+                        CONF_MAX_CONCURRENCY, DEFAULT_MAX_CONCURRENCY
+                    ),
+                ): vol.All(vol.Coerce(int), vol.Range(min=1, max=16)),
+                **{
+                    vol.Optional(
+                        key, default=self.options.get(key, default)
+                    ): vol.All(vol.Coerce(int), vol.Range(min=10, max=86400))
+                    for key, default in ENDPOINT_INTERVALS.values()
+                },
+                vol.Optional(
+                    CONF_ACTIVE_INTERVAL,
+                    default=self.options.get(
+                        CONF_ACTIVE_INTERVAL, DEFAULT_ACTIVE_INTERVAL
+                    ),
+                ): vol.All(vol.Coerce(int), vol.Range(min=5, max=3600)),
+                vol.Optional(
+                    CONF_PARKED_INTERVAL,
+                    default=self.options.get(
+                        CONF_PARKED_INTERVAL, DEFAULT_PARKED_INTERVAL
+                    ),
+                ): vol.All(vol.Coerce(int), vol.Range(min=10, max=86400)),
+                vol.Optional(
+                    CONF_STAGGER_REFRESH,
+                    default=self.options.get(
+                        CONF_STAGGER_REFRESH, DEFAULT_STAGGER_REFRESH
+                    ),
+                ): bool,
+                vol.Optional(
+                    CONF_TRACK_POINTS,
+                    default=self.options.get(CONF_TRACK_POINTS, DEFAULT_TRACK_POINTS),
+                ): bool,
+                vol.Optional(
+                    CONF_TRACK_TOLERANCE,
+                    default=self.options.get(
+                        CONF_TRACK_TOLERANCE, DEFAULT_TRACK_TOLERANCE
+                    ),
+                ): vol.All(vol.Coerce(float), vol.Range(min=0, max=100)),
+                vol.Optional(
+                    CONF_RIDE_STATISTICS,
+                    default=self.options.get(
+                        CONF_RIDE_STATISTICS, DEFAULT_RIDE_STATISTICS
+                    ),
+                ): bool,
             }
         )
 
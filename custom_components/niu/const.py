@@ -5,10 +5,39 @@ DOMAIN = "niu"
 CONF_USERNAME = "username"
 CONF_PASSWORD = "password"
 CONF_SCOOTER_ID = "scooter_id"
+CONF_ALL_SCOOTERS = "all_scooters"
 CONF_MONITORED_VARIABLES = "monitored_variables"
+CONF_MAX_CONCURRENCY = "max_concurrency"
+CONF_BATTERY_INTERVAL = "battery_interval"
+CONF_MOTOR_INTERVAL = "motor_interval"
+CONF_OVERALL_INTERVAL = "overall_interval"
+CONF_TRACK_INTERVAL = "track_interval"
+CONF_ACTIVE_INTERVAL = "active_interval"
+CONF_PARKED_INTERVAL = "parked_interval"
+CONF_STAGGER_REFRESH = "stagger_refresh"
+CONF_TRACK_POINTS = "track_points"
+CONF_TRACK_TOLERANCE = "track_tolerance"
+CONF_RIDE_STATISTICS = "ride_statistics"
 
 DEFAULT_SCOOTER_ID = 0
 DEFAULT_MONITORED_VARIABLES = ["BatteryCharge"]
+DEFAULT_MAX_CONCURRENCY = 4
+# Polling intervals in seconds, chosen by how often each endpoint's data changes
+DEFAULT_BATTERY_INTERVAL = 60
+DEFAULT_MOTOR_INTERVAL = 30
+DEFAULT_OVERALL_INTERVAL = 3600
+# The track list is refetched whenever a ride ends, so its interval is only
+# a safety net
+DEFAULT_TRACK_INTERVAL = 21600
+# Motor interval while riding or charging, and the floor for live data while
+# the scooter is parked and locked
+DEFAULT_ACTIVE_INTERVAL = 10
+DEFAULT_PARKED_INTERVAL = 1800
+DEFAULT_STAGGER_REFRESH = True
+DEFAULT_TRACK_POINTS = False
+# Metres a stored track point may be dropped within; 0 keeps every point
+DEFAULT_TRACK_TOLERANCE = 5
+DEFAULT_RIDE_STATISTICS = False
 
 # API URLs
 ACCOUNT_BASE_URL = "https://account.niu.com"
@@ -19,6 +48,44 @@ MOTOR_INDEX_API_URI = "/v5/scooter/motor_data/index_info"
 MOTOINFO_LIST_API_URI = "/v5/scooter/list"
 MOTOINFO_ALL_API_URI = "/motoinfo/overallTally"
 TRACK_LIST_API_URI = "/v5/track/list/v2"
+TRACK_DETAIL_API_URI = "/v5/track/detail"
+# Tracks per page when syncing the ride history
+TRACK_PAGE_SIZE = 10
+# Tracks per page, and pages per refresh cycle, when downloading the older
+# rides of a history synced for the first time
+TRACK_BACKFILL_PAGE_SIZE = 50
+TRACK_BACKFILL_PAGES = 5
+# Tracks whose GPS points are downloaded per refresh cycle
+TRACK_POINTS_BATCH = 20
+REQUEST_TIMEOUT = 30
+# Seconds a refresh cycle, or a background refetch, may take in total;
+# requests still running then are cancelled
+REFRESH_BUDGET = 45
+# Requests per second and burst size allowed to all NIU entries together,
+# for logins to account.niu.com and data requests to app-api.niu.com
+RATE_LIMIT_LOGIN_RATE = 0.2
+RATE_LIMIT_LOGIN_BURST = 5
+RATE_LIMIT_DATA_RATE = 2.0
+RATE_LIMIT_DATA_BURST = 10
+
+# Keys into hass.data[DOMAIN]
+DATA_ACCOUNTS = "accounts"
+DATA_AUTH_STORE = "auth_store"
+DATA_RATE_LIMITER = "rate_limiter"
+
+# Data endpoints polled by the coordinator
+ENDPOINT_BATTERY = "battery"
+ENDPOINT_MOTOR = "motor"
+ENDPOINT_OVERALL = "overall"
+ENDPOINT_TRACK = "track"
+
+# Option key and default interval of every endpoint
+ENDPOINT_INTERVALS = {
+    ENDPOINT_BATTERY: (CONF_BATTERY_INTERVAL, DEFAULT_BATTERY_INTERVAL),
+    ENDPOINT_MOTOR: (CONF_MOTOR_INTERVAL, DEFAULT_MOTOR_INTERVAL),
+    ENDPOINT_OVERALL: (CONF_OVERALL_INTERVAL, DEFAULT_OVERALL_INTERVAL),
+    ENDPOINT_TRACK: (CONF_TRACK_INTERVAL, DEFAULT_TRACK_INTERVAL),
+}
 
 # Sensor types
 SENSOR_TYPE_BAT = "BAT"
@@ -27,6 +94,18 @@ SENSOR_TYPE_DIST = "DIST"
 SENSOR_TYPE_OVERALL = "TOTAL"
 SENSOR_TYPE_POS = "POSITION"
 SENSOR_TYPE_TRACK = "TRACK"
+SENSOR_TYPE_TRIPS = "TRIPS"
+
+# Endpoint that provides the data of each sensor type
+SENSOR_TYPE_ENDPOINTS = {
+    SENSOR_TYPE_BAT: ENDPOINT_BATTERY,
+    SENSOR_TYPE_MOTO: ENDPOINT_MOTOR,
+    SENSOR_TYPE_DIST: ENDPOINT_MOTOR,
+    SENSOR_TYPE_OVERALL: ENDPOINT_OVERALL,
+    SENSOR_TYPE_POS: ENDPOINT_MOTOR,
+    SENSOR_TYPE_TRACK: ENDPOINT_TRACK,
+    SENSOR_TYPE_TRIPS: ENDPOINT_TRACK,
+}
 
 # Available sensors
 AVAILABLE_SENSORS = [
@@ -56,6 +135,18 @@ AVAILABLE_SENSORS = [
     "LastTrackAverageSpeed",
     "LastTrackRidingtime",
     "LastTrackThumb",
+    "TodayDistance",
+    "TodayRides",
+    "TodayRidingTime",
+    "TodayAverageSpeed",
+    "WeekDistance",
+    "WeekRides",
+    "WeekRidingTime",
+    "WeekAverageSpeed",
+    "MonthDistance",
+    "MonthRides",
+    "MonthRidingTime",
+    "MonthAverageSpeed",
 ]
 
 # Chinese sensor names for UI display
@@ -86,4 +177,16 @@ SENSOR_NAMES_ZH = {
     "LastTrackAverageSpeed": "最后行程平均速度",
     "LastTrackRidingtime": "最后行程骑行时间",
     "LastTrackThumb": "最后行程缩略图",
+    "TodayDistance": "今日骑行距离",
+    "TodayRides": "今日骑行次数",
+    "TodayRidingTime": "今日骑行时间",
+    "TodayAverageSpeed": "今日平均速度",
+    "WeekDistance": "本周骑行距离",
+    "WeekRides": "本周骑行次数",
+    "WeekRidingTime": "本周骑行时间",
+    "WeekAverageSpeed": "本周平均速度",
+    "MonthDistance": "本月骑行距离",
+    "MonthRides": "本月骑行次数",
+    "MonthRidingTime": "本月骑行时间",
+    "MonthAverageSpeed": "本月平均速度",
 }
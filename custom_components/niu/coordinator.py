@@ -1,183 +1,616 @@
 """Data coordinator for NIU integration."""
 
+import asyncio
+from bisect import bisect_right
+from collections.abc import Awaitable, Callable, Iterable
 import logging
 from datetime import datetime, timedelta
-from time import gmtime, strftime
+from functools import partial
 from typing import Any
 
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.helpers.debounce import Debouncer
 from homeassistant.helpers.update_coordinator import DataUpdateCoordinator
+from homeassistant.util import dt as dt_util
 
-from .api import NiuAPI, NiuAuthError, NiuConnectionError
+from .account import NiuAccount
+from .api import NiuApiError, NiuAuthError, NiuConnectionError, NiuTransientError
 from .const import (
-    SENSOR_TYPE_BAT,
-    SENSOR_TYPE_MOTO,
-    SENSOR_TYPE_DIST,
-    SENSOR_TYPE_OVERALL,
-    SENSOR_TYPE_POS,
-    SENSOR_TYPE_TRACK,
+    CONF_ACTIVE_INTERVAL,
+    CONF_ALL_SCOOTERS,
+    CONF_PARKED_INTERVAL,
+    CONF_RIDE_STATISTICS,
+    CONF_SCOOTER_ID,
+    CONF_STAGGER_REFRESH,
+    CONF_TRACK_POINTS,
+    CONF_TRACK_TOLERANCE,
+    DEFAULT_ACTIVE_INTERVAL,
+    DEFAULT_PARKED_INTERVAL,
+    DEFAULT_RIDE_STATISTICS,
+    DEFAULT_SCOOTER_ID,
+    DEFAULT_STAGGER_REFRESH,
+    DEFAULT_TRACK_POINTS,
+    DEFAULT_TRACK_TOLERANCE,
+    CONF_MAX_CONCURRENCY,
+    DEFAULT_MAX_CONCURRENCY,
+    DOMAIN,
+    ENDPOINT_BATTERY,
+    ENDPOINT_INTERVALS,
+    ENDPOINT_MOTOR,
+    ENDPOINT_OVERALL,
+    ENDPOINT_TRACK,
+    REFRESH_BUDGET,
+    TRACK_BACKFILL_PAGES,
+    TRACK_POINTS_BATCH,
 )
+from .models import VehicleSnapshot
+from .points import NiuTrackPointStore, TrackPoints
+from .ratelimit import rate_limit_key
+from .resilience import NiuCircuitOpenError, async_retry
+from .scheduler import IDLE_REFRESH_INTERVAL, MIN_REFRESH_INTERVAL
+from .statistics import async_import_ride_statistics
+from .tracks import NiuTrackHistory
+from .trips import NiuTripAggregator
+from .vehicle import NiuVehicle
 
 _LOGGER = logging.getLogger(__name__)
 
+# Wait this long after an entity needs a new endpoint before refreshing, so
+# all entities added together are fetched in one cycle
+REPLAN_REFRESH_DELAY = 1
+
 
 class NiuDataCoordinator(DataUpdateCoordinator):
-    """NIU data coordinator."""
+    """NIU data coordinator.
+
+    Polls either the one scooter selected by ``scooter_id`` or, in
+    multi-vehicle mode, every scooter on the account. All scooters of an
+    entry share one schedule tick and one concurrency limit.
+    """
 
-    def __init__(self, hass: HomeAssistant, config_entry: ConfigEntry):
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        config_entry: ConfigEntry,
+        account: NiuAccount,
+    ):
         """Initialize the coordinator."""
         super().__init__(
             hass,
             _LOGGER,
             name="NIU Scooter",
-            update_interval=timedelta(seconds=30),
+            update_interval=MIN_REFRESH_INTERVAL,
         )
-        
+
         self.config_entry = config_entry
-        self.api = NiuAPI(
-            config_entry.data["username"],
-            config_entry.data["password"]
-        )
-        self.sn = None
+        self.account = account
+        self.api = account.api
         self.token = None
-        self._data_bat = None
-        self._data_moto = None
-        self._data_moto_info = None
-        self._data_track_info = None
+        self.all_scooters: bool = config_entry.data.get(CONF_ALL_SCOOTERS, False)
+        self.vehicles: dict[str, NiuVehicle] = {}
+        self.track_histories: dict[str, NiuTrackHistory] = {}
+        self.trip_aggregators: dict[str, NiuTripAggregator] = {}
+        # Only kept when downloading track points is enabled
+        self.track_points: dict[str, NiuTrackPointStore] = {}
+        self._download_points: bool = config_entry.options.get(
+            CONF_TRACK_POINTS, DEFAULT_TRACK_POINTS
+        )
+        self._track_tolerance: float = config_entry.options.get(
+            CONF_TRACK_TOLERANCE, DEFAULT_TRACK_TOLERANCE
+        )
+        self._import_statistics: bool = config_entry.options.get(
+            CONF_RIDE_STATISTICS, DEFAULT_RIDE_STATISTICS
+        )
+        # Start time of the newest ride imported into statistics per scooter,
+        # since setup
+        self._statistics_imported: dict[str, int | None] = {}
+        # Held while the rides of a scooter are processed in the background
+        self._track_locks: dict[str, asyncio.Lock] = {}
+        # (SN, endpoint) of the fetches running in the background
+        self._revalidating: set[tuple[str, str]] = set()
+        # Fetches of the running refresh and background refetches
+        self._inflight: set[asyncio.Task] = set()
+
+        self._semaphore = asyncio.Semaphore(
+            config_entry.options.get(CONF_MAX_CONCURRENCY, DEFAULT_MAX_CONCURRENCY)
+        )
+        self._base_intervals = {
+            endpoint: timedelta(seconds=config_entry.options.get(key, default))
+            for endpoint, (key, default) in ENDPOINT_INTERVALS.items()
+        }
+        self._active_interval = timedelta(
+            seconds=config_entry.options.get(
+                CONF_ACTIVE_INTERVAL, DEFAULT_ACTIVE_INTERVAL
+            )
+        )
+        self._parked_interval = timedelta(
+            seconds=config_entry.options.get(
+                CONF_PARKED_INTERVAL, DEFAULT_PARKED_INTERVAL
+            )
+        )
+        self._stagger: bool = config_entry.options.get(
+            CONF_STAGGER_REFRESH, DEFAULT_STAGGER_REFRESH
+        )
+        self._fetchers: dict[
+            str, Callable[[str, str], Awaitable[dict[str, Any]]]
+        ] = {
+            ENDPOINT_BATTERY: self.api.get_battery_info,
+            ENDPOINT_MOTOR: self.api.get_motor_info,
+            ENDPOINT_OVERALL: self.api.get_overall_info,
+            ENDPOINT_TRACK: self._async_sync_tracks,
+        }
+        self._replan_debouncer = Debouncer(
+            hass,
+            _LOGGER,
+            cooldown=REPLAN_REFRESH_DELAY,
+            immediate=False,
+            function=self.async_refresh,
+        )
+
+    async def async_shutdown(self) -> None:
+        """Cancel any pending refresh when the entry unloads."""
+        await super().async_shutdown()
+        self._replan_debouncer.async_shutdown()
+        self.async_cancel_inflight()
 
-    async def _async_update_data(self) -> dict[str, Any]:
-        """Update data from NIU API."""
+    @callback
+    def async_cancel_inflight(self) -> None:
+        """Abort every fetch in flight instead of waiting for its timeout."""
+        for task in self._inflight:
+            task.cancel()
+
+    async def _async_update_data(self) -> dict[str, VehicleSnapshot]:
+        """Update data from NIU API.
+
+        The whole cycle has REFRESH_BUDGET seconds. Fetches still running
+        when it is spent are cancelled and their endpoints keep their
+        previous data.
+        """
+        deadline = self.hass.loop.time() + REFRESH_BUDGET
+        # Queue this entry's requests, including background refetches
+        # started from here, separately from other entries'
+        rate_limit_key.set(self.config_entry.entry_id)
         try:
-            # Get token if not available
-            if not self.token:
-                self.token = await self.hass.async_add_executor_job(self.api.get_token)
-                
-                # Get SN from vehicles info
-                vehicles = await self.hass.async_add_executor_job(
-                    self.api.get_vehicles_info, self.token
-                )
-                scooter_id = self.config_entry.data.get("scooter_id", 0)
-                self.sn = vehicles["data"]["items"][scooter_id]["sn_id"]
-
-            # Update all data
-            await self._update_battery_info()
-            await self._update_motor_info()
-            await self._update_overall_info()
-            await self._update_track_info()
-
-            return {
-                "battery": self._data_bat,
-                "motor": self._data_moto,
-                "overall": self._data_moto_info,
-                "track": self._data_track_info,
-            }
+            async with asyncio.timeout_at(deadline):
+                await self._async_ensure_token()
+                await self._async_ensure_vehicles()
+
+            # Update the endpoints that are due concurrently, bounded by the
+            # entry's limit; the others keep their previous data
+            now = dt_util.utcnow()
+            due = {sn: vehicle.scheduler.due(now) for sn, vehicle in self.vehicles.items()}
+            # Mark first, so a fetch can make an endpoint due again
+            for sn, endpoints in due.items():
+                self.vehicles[sn].scheduler.mark_attempted(endpoints, now)
+
+            # Data that may still be served is revalidated in the background,
+            # so a slow endpoint never holds back the others; only endpoints
+            # without servable data are waited for
+            blocking: list[tuple[NiuVehicle, str]] = []
+            for sn, endpoints in due.items():
+                vehicle = self.vehicles[sn]
+                for endpoint in endpoints:
+                    if vehicle.cache.is_servable(endpoint, now):
+                        self._async_revalidate(vehicle, endpoint)
+                    else:
+                        blocking.append((vehicle, endpoint))
+            await self._async_fetch_within(blocking, deadline)
+            if blocking and all(
+                isinstance(vehicle.cache.error(endpoint), NiuApiError)
+                for vehicle, endpoint in blocking
+            ):
+                # A token revoked by NIU is refused with an error status
+                # rather than HTTP 401, so log in again once nothing works
+                _LOGGER.warning("NIU refused every request, logging in again")
+                await self._async_invalidate_token()
+
+            now = dt_util.utcnow()
+            self.update_interval = min(
+                (vehicle.scheduler.next_refresh(now) for vehicle in self.vehicles.values()),
+                default=IDLE_REFRESH_INTERVAL,
+            )
+
+            return self._snapshots(now)
 
         except (NiuAuthError, NiuConnectionError) as err:
             _LOGGER.error("Failed to update NIU data: %s", err)
             # Reset token on auth error
             if isinstance(err, NiuAuthError):
-                self.token = None
+                await self._async_invalidate_token()
             raise
 
-    async def _update_battery_info(self):
-        """Update battery information."""
+    async def _async_fetch_within(
+        self, fetches: list[tuple[NiuVehicle, str]], deadline: float
+    ) -> None:
+        """Run fetches concurrently, cancelling those unfinished at the deadline."""
+        if not fetches:
+            return
+        tasks = {
+            self.hass.async_create_task(
+                self._async_fetch(vehicle, endpoint, self.token), eager_start=True
+            ): (vehicle, endpoint)
+            for vehicle, endpoint in fetches
+        }
+        self._inflight.update(tasks)
         try:
-            self._data_bat = await self.hass.async_add_executor_job(
-                self.api.get_battery_info, self.sn, self.token
+            _, pending = await asyncio.wait(
+                tasks, timeout=max(0.0, deadline - self.hass.loop.time())
             )
-        except Exception as err:
-            _LOGGER.warning("Failed to update battery info: %s", err)
+        finally:
+            # Also reached when the refresh itself is cancelled
+            for task in tasks:
+                task.cancel()
+            self._inflight.difference_update(tasks)
+        if pending:
+            await asyncio.wait(pending)
 
-    async def _update_motor_info(self):
-        """Update motor information."""
+        for task in pending:
+            vehicle, endpoint = tasks[task]
+            _LOGGER.warning(
+                "Refresh budget of %ss spent, cancelled %s info of %s",
+                REFRESH_BUDGET,
+                endpoint,
+                vehicle.sn,
+            )
+            vehicle.set_error(endpoint, TimeoutError("refresh budget spent"))
+
+    def _snapshots(self, now: datetime) -> dict[str, VehicleSnapshot]:
+        """Return the current snapshot of every vehicle."""
+        # Also moves the ride totals on to a new day, week or month
+        for sn, vehicle in self.vehicles.items():
+            vehicle.set_trips(self.trip_aggregators[sn].summary(now))
+        return {sn: vehicle.snapshot for sn, vehicle in self.vehicles.items()}
+
+    @callback
+    def _async_revalidate(self, vehicle: NiuVehicle, endpoint: str) -> None:
+        """Refetch an endpoint in the background unless that is underway."""
+        key = (vehicle.sn, endpoint)
+        if key in self._revalidating:
+            return
+        self._revalidating.add(key)
+        task = self.config_entry.async_create_background_task(
+            self.hass,
+            self._async_revalidate_endpoint(vehicle, endpoint, self.token),
+            f"{DOMAIN} revalidate {endpoint} of {vehicle.sn}",
+        )
+        self._inflight.add(task)
+        task.add_done_callback(self._inflight.discard)
+
+    async def _async_revalidate_endpoint(
+        self, vehicle: NiuVehicle, endpoint: str, token: str
+    ) -> None:
+        """Refetch an endpoint and publish the result to the entities."""
         try:
-            self._data_moto = await self.hass.async_add_executor_job(
-                self.api.get_motor_info, self.sn, self.token
+            async with asyncio.timeout(REFRESH_BUDGET):
+                await self._async_fetch(vehicle, endpoint, token)
+        except TimeoutError as err:
+            _LOGGER.warning(
+                "Refresh budget of %ss spent, cancelled %s info of %s",
+                REFRESH_BUDGET,
+                endpoint,
+                vehicle.sn,
+            )
+            vehicle.set_error(endpoint, err)
+        finally:
+            self._revalidating.discard((vehicle.sn, endpoint))
+
+        now = dt_util.utcnow()
+        self.data = self._snapshots(now)
+        self.async_update_listeners()
+        if vehicle.scheduler.due(now):
+            # The fetch made an endpoint due again, e.g. the track list
+            # after a new ride
+            self._replan_debouncer.async_schedule_call()
+
+    async def _async_ensure_token(self) -> None:
+        """Fetch the account's current access token."""
+        self.token = await self.account.async_get_token()
+
+    async def _async_invalidate_token(self) -> None:
+        """Report the current token as rejected to the account."""
+        await self.account.async_invalidate_token(self.token)
+        self.token = None
+
+    async def _async_ensure_vehicles(self) -> None:
+        """Resolve the scooters this entry polls."""
+        if self.vehicles:
+            return
+
+        if self.all_scooters:
+            items = await self.account.async_get_vehicles()
+            scooters = [
+                (item["sn_id"], scooter_id, item.get("scooter_name"))
+                for scooter_id, item in enumerate(items)
+            ]
+        else:
+            scooter_id = self.config_entry.data.get(CONF_SCOOTER_ID, DEFAULT_SCOOTER_ID)
+            sn = await self.account.async_get_sn(scooter_id)
+            scooters = [(sn, scooter_id, None)]
+
+        for sn, scooter_id, name in scooters:
+            self.vehicles[sn] = NiuVehicle(
+                sn,
+                scooter_id,
+                name,
+                self._base_intervals,
+                self._active_interval,
+                self._parked_interval,
+                self._stagger,
             )
-        except Exception as err:
-            _LOGGER.warning("Failed to update motor info: %s", err)
+            self.track_histories[sn] = NiuTrackHistory(self.hass, sn)
+            self._track_locks[sn] = asyncio.Lock()
+            self.trip_aggregators[sn] = NiuTripAggregator(self.hass, sn)
+            if self._download_points:
+                self.track_points[sn] = NiuTrackPointStore(self.hass, sn)
+            if self._download_points or self._import_statistics:
+                # Keep the ride history syncing without any track sensors
+                self.vehicles[sn].add_endpoint_users([ENDPOINT_TRACK])
+
+    @callback
+    def async_register_endpoints(
+        self, sn: str, endpoints: Iterable[str]
+    ) -> CALLBACK_TYPE:
+        """Register an entity's endpoints and return a callback to release them.
+
+        Endpoints nobody has registered are never fetched. Registering an
+        endpoint that was not fetched yet triggers a refresh.
+        """
+        vehicle = self.vehicles[sn]
+        endpoints = set(endpoints)
+        missing = vehicle.add_endpoint_users(endpoints)
+        if missing:
+            _LOGGER.debug("Now fetching %s for %s", ", ".join(sorted(missing)), sn)
+            self._replan_debouncer.async_schedule_call()
+
+        @callback
+        def _async_unregister() -> None:
+            vehicle.remove_endpoint_users(endpoints)
+
+        return _async_unregister
+
+    async def _async_sync_tracks(self, sn: str, token: str) -> dict[str, Any]:
+        """Add new rides to a vehicle's history; return the newest track page.
 
-    async def _update_overall_info(self):
-        """Update overall information."""
+        The page is returned as soon as the new rides are stored; the rest
+        of the work on the history runs in the background.
+        """
+        page = await self.track_histories[sn].async_sync(
+            self.api.iter_track_pages(sn, token)
+        )
+        task = self.config_entry.async_create_background_task(
+            self.hass,
+            self._async_process_tracks(sn, token),
+            f"{DOMAIN} process tracks of {sn}",
+        )
+        self._inflight.add(task)
+        task.add_done_callback(self._inflight.discard)
+        return page
+
+    async def _async_process_tracks(self, sn: str, token: str) -> None:
+        """Backfill a vehicle's history and update what is derived from it.
+
+        The totals, statistics and points need the whole history, so they
+        wait for the backfill. The step has its own REFRESH_BUDGET; while
+        work is left, including when the step is cut off, the track endpoint
+        is fetched again soon.
+        """
+        history = self.track_histories[sn]
+        vehicle = self.vehicles[sn]
+        async with self._track_locks[sn]:
+            try:
+                async with asyncio.timeout(REFRESH_BUDGET):
+                    if history.backfilling:
+                        await self._async_backfill_tracks(sn, token)
+                    if not history.backfilling:
+                        await self.trip_aggregators[sn].async_add_new(
+                            await history.async_load(), dt_util.utcnow()
+                        )
+                        if self._import_statistics and (
+                            sn not in self._statistics_imported
+                            or self._statistics_imported[sn]
+                            != history.last_start_time
+                        ):
+                            await self._async_import_statistics(sn)
+                        if sn in self.track_points:
+                            await self._async_sync_track_points(sn, token)
+            except TimeoutError:
+                _LOGGER.warning(
+                    "Refresh budget of %ss spent, cancelled processing tracks of %s",
+                    REFRESH_BUDGET,
+                    sn,
+                )
+                vehicle.scheduler.mark_failed(ENDPOINT_TRACK, dt_util.utcnow())
+            except asyncio.CancelledError:
+                vehicle.scheduler.mark_failed(ENDPOINT_TRACK, dt_util.utcnow())
+                raise
+
+        now = dt_util.utcnow()
+        self.data = self._snapshots(now)
+        self.async_update_listeners()
+        if vehicle.scheduler.due(now):
+            # More pages or points are left
+            self._replan_debouncer.async_schedule_call()
+
+    async def _async_backfill_tracks(self, sn: str, token: str) -> None:
+        """Download the next TRACK_BACKFILL_PAGES pages of older rides.
+
+        Errors end the backfill until the next track refresh without failing
+        the newest rides.
+        """
         try:
-            self._data_moto_info = await self.hass.async_add_executor_job(
-                self.api.get_overall_info, self.sn, self.token
+            await self.track_histories[sn].async_backfill(
+                partial(self.api.iter_track_pages, sn, token), TRACK_BACKFILL_PAGES
             )
-        except Exception as err:
-            _LOGGER.warning("Failed to update overall info: %s", err)
+        except (NiuAuthError, NiuConnectionError, KeyError, TypeError, ValueError) as err:
+            _LOGGER.warning("Failed to backfill the tracks of %s: %s", sn, err)
+            return
+        if self.track_histories[sn].backfilling:
+            self.vehicles[sn].scheduler.mark_due(ENDPOINT_TRACK)
 
-    async def _update_track_info(self):
-        """Update track information."""
+    async def _async_import_statistics(self, sn: str) -> None:
+        """Import a vehicle's ride history into long-term statistics."""
+        if "recorder" not in self.hass.config.components:
+            _LOGGER.debug("Recorder not loaded, not importing ride statistics")
+            return
+        await async_import_ride_statistics(
+            self.hass,
+            sn,
+            f"NIU {self.vehicles[sn].name}",
+            await self.track_histories[sn].async_load(),
+        )
+        self._statistics_imported[sn] = self.track_histories[sn].last_start_time
+
+    async def _async_sync_track_points(self, sn: str, token: str) -> None:
+        """Download the GPS points of the rides that have none stored yet.
+
+        At most TRACK_POINTS_BATCH rides are downloaded per cycle; the track
+        endpoint stays due until the backlog is cleared. A ride whose points
+        the API refuses is stored without points; other download errors end
+        the batch until the next cycle. They never fail the ride history.
+        """
+        store = self.track_points[sn]
+        history = await self.track_histories[sn].async_load()
+        synced_until = await store.async_get_synced_until()
+        first = (
+            0
+            if synced_until is None
+            else bisect_right(history, synced_until, key=lambda track: track.start_time)
+        )
+        pending = history[first:]
+
+        for track in pending[:TRACK_POINTS_BATCH]:
+            points = TrackPoints()
+            if track.track_id:
+                what = f"points of track {track.track_id} of {sn}"
+                try:
+                    payload = await async_retry(
+                        partial(
+                            self.api.get_track_detail,
+                            sn,
+                            token,
+                            track.track_id,
+                            track.start_time,
+                        ),
+                        what,
+                    )
+                    points = TrackPoints.from_api(payload).simplified(
+                        self._track_tolerance
+                    )
+                except (NiuAuthError, NiuTransientError) as err:
+                    _LOGGER.warning("Failed to download %s: %s", what, err)
+                    return
+                except (NiuConnectionError, KeyError, TypeError, ValueError) as err:
+                    # Skip the track rather than retrying it forever
+                    _LOGGER.warning("Skipping %s: %s", what, err)
+            await store.async_add_track(track, points)
+
+        if len(pending) > TRACK_POINTS_BATCH:
+            self.vehicles[sn].scheduler.mark_due(ENDPOINT_TRACK)
+
+    async def _async_verify_sn(self, vehicle: NiuVehicle) -> None:
+        """Reload the entry if its cached serial number is out of date."""
+        if self.all_scooters:
+            # Listed afresh on every setup
+            return
         try:
-            self._data_track_info = await self.hass.async_add_executor_job(
-                self.api.get_track_info, self.sn, self.token
+            sn = await self.account.async_verify_sn(vehicle.scooter_id, vehicle.sn)
+        except (NiuAuthError, NiuConnectionError, LookupError) as err:
+            _LOGGER.debug(
+                "Failed to verify the serial number of scooter %s: %s",
+                vehicle.scooter_id,
+                err,
             )
-        except Exception as err:
-            _LOGGER.warning("Failed to update track info: %s", err)
-
-    def get_battery_data(self, field: str) -> Any:
-        """Get battery data by field."""
-        if not self._data_bat or "data" not in self._data_bat:
-            return None
-        return self._data_bat["data"]["batteries"]["compartmentA"].get(field)
-
-    def get_motor_data(self, field: str) -> Any:
-        """Get motor data by field."""
-        if not self._data_moto or "data" not in self._data_moto:
-            return None
-        return self._data_moto["data"].get(field)
-
-    def get_distance_data(self, field: str) -> Any:
-        """Get distance data by field."""
-        if not self._data_moto or "data" not in self._data_moto or "lastTrack" not in self._data_moto["data"]:
-            return None
-        return self._data_moto["data"]["lastTrack"].get(field)
-
-    def get_position_data(self, field: str) -> Any:
-        """Get position data by field."""
-        if not self._data_moto or "data" not in self._data_moto or "postion" not in self._data_moto["data"]:
-            return None
-        return self._data_moto["data"]["postion"].get(field)
-
-    def get_overall_data(self, field: str) -> Any:
-        """Get overall data by field."""
-        if not self._data_moto_info or "data" not in self._data_moto_info:
-            return None
-        return self._data_moto_info["data"].get(field)
-
-    def get_track_data(self, field: str) -> Any:
-        """Get track data by field."""
-        if not self._data_track_info or "data" not in self._data_track_info or not self._data_track_info["data"]:
-            return None
-            
-        if field == "startTime" or field == "endTime":
-            return datetime.fromtimestamp(
-                (self._data_track_info["data"][0][field]) / 1000
-            ).strftime("%Y-%m-%d %H:%M:%S")
-        if field == "ridingtime":
-            return strftime(
-                "%H:%M:%S", gmtime(self._data_track_info["data"][0][field])
+            return
+        if sn != vehicle.sn:
+            _LOGGER.warning(
+                "Scooter %s is now %s instead of %s, reloading",
+                vehicle.scooter_id,
+                sn,
+                vehicle.sn,
             )
-        if field == "track_thumb":
-            thumburl = self._data_track_info["data"][0][field].replace(
-                "app-api.niucache.com", "app-api.niu.com"
+            self.hass.config_entries.async_schedule_reload(self.config_entry.entry_id)
+
+    async def _async_fetch(
+        self, vehicle: NiuVehicle, endpoint: str, token: str
+    ) -> None:
+        """Fetch one endpoint of a vehicle and schedule its next fetch.
+
+        The next fetch was scheduled a full interval ahead when this one
+        started; a fetch that fails or is cut off brings it forward to a
+        short retry, or to when the endpoint's circuit lets a trial through.
+        """
+        try:
+            await self._async_fetch_endpoint(vehicle, endpoint, token)
+        except asyncio.CancelledError:
+            vehicle.scheduler.mark_failed(endpoint, dt_util.utcnow())
+            raise
+        if vehicle.cache.error(endpoint) is None:
+            vehicle.scheduler.mark_succeeded(endpoint)
+        else:
+            vehicle.scheduler.mark_failed(
+                endpoint, dt_util.utcnow(), vehicle.breakers[endpoint].open_until
+            )
+
+    async def _async_fetch_endpoint(
+        self, vehicle: NiuVehicle, endpoint: str, token: str
+    ) -> None:
+        """Fetch one endpoint of a vehicle and record its outcome.
+
+        Transient errors are retried with backoff. A rejected token is
+        replaced once for all requests that used it and the request is
+        repeated. While the endpoint's circuit is open it is not called at
+        all. A failed request keeps the vehicle's previous data; if the API
+        rejected it, the vehicle's serial number is checked as well.
+        """
+        breaker = vehicle.breakers[endpoint]
+        fetcher = self._fetchers[endpoint]
+        what = f"{endpoint} info of {vehicle.sn}"
+        async with self._semaphore:
+            # Only ask once a request can start, so a trial call let through
+            # always records its outcome
+            if not breaker.allow(dt_util.utcnow()):
+                _LOGGER.debug("Circuit of %s is open", what)
+                vehicle.set_error(
+                    endpoint, NiuCircuitOpenError(f"{endpoint} info failed repeatedly")
+                )
+                return
+            try:
+                try:
+                    data = await async_retry(partial(fetcher, vehicle.sn, token), what)
+                except NiuAuthError:
+                    token = self.token = await self.account.async_reauthenticate(token)
+                    data = await async_retry(partial(fetcher, vehicle.sn, token), what)
+            except asyncio.CancelledError:
+                # Cut off by the refresh budget or an unload
+                breaker.record_failure(dt_util.utcnow())
+                raise
+            except Exception as err:
+                _LOGGER.warning(
+                    "Failed to update %s info of %s: %s", endpoint, vehicle.sn, err
+                )
+                breaker.record_failure(dt_util.utcnow())
+                if breaker.state == "open":
+                    _LOGGER.warning(
+                        "Pausing %s info of %s until %s",
+                        endpoint,
+                        vehicle.sn,
+                        breaker.open_until,
+                    )
+                vehicle.set_error(endpoint, err)
+                error = err
+            else:
+                breaker.record_success()
+                error = None
+        if error is not None:
+            if isinstance(error, NiuApiError):
+                await self._async_verify_sn(vehicle)
+            return
+
+        try:
+            vehicle.set_payload(endpoint, data, dt_util.utcnow())
+        except (KeyError, TypeError, ValueError) as err:
+            _LOGGER.warning(
+                "Failed to parse %s info of %s: %s", endpoint, vehicle.sn, err
             )
-            return thumburl
-        return self._data_track_info["data"][0].get(field)
-
-    def get_data_by_type(self, sensor_type: str, field: str) -> Any:
-        """Get data by sensor type and field."""
-        if sensor_type == SENSOR_TYPE_BAT:
-            return self.get_battery_data(field)
-        elif sensor_type == SENSOR_TYPE_MOTO:
-            return self.get_motor_data(field)
-        elif sensor_type == SENSOR_TYPE_DIST:
-            return self.get_distance_data(field)
-        elif sensor_type == SENSOR_TYPE_POS:
-            return self.get_position_data(field)
-        elif sensor_type == SENSOR_TYPE_OVERALL:
-            return self.get_overall_data(field)
-        elif sensor_type == SENSOR_TYPE_TRACK:
-            return self.get_track_data(field)
-        return None
+            vehicle.set_error(endpoint, err)
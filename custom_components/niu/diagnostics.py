@@ -0,0 +1,64 @@
+"""Diagnostics support for the NIU integration."""
+
+from __future__ import annotations
+
+from datetime import datetime
+from typing import Any
+
+from homeassistant.components.diagnostics import async_redact_data
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import CONF_PASSWORD, CONF_USERNAME
+from homeassistant.core import HomeAssistant
+from homeassistant.util import dt as dt_util
+
+from .coordinator import NiuDataCoordinator
+from .ratelimit import async_get_rate_limiter
+from .vehicle import NiuVehicle
+
+TO_REDACT = {CONF_USERNAME, CONF_PASSWORD}
+
+
+async def async_get_config_entry_diagnostics(
+    hass: HomeAssistant, config_entry: ConfigEntry
+) -> dict[str, Any]:
+    """Return diagnostics of a config entry, including the age of its data."""
+    coordinator: NiuDataCoordinator = config_entry.runtime_data.coordinator
+    now = dt_util.utcnow()
+    return {
+        "entry": {
+            "data": async_redact_data(dict(config_entry.data), TO_REDACT),
+            "options": dict(config_entry.options),
+        },
+        "last_update_success": coordinator.last_update_success,
+        "rate_limiter": async_get_rate_limiter(hass).stats(config_entry.entry_id),
+        "vehicles": [
+            _vehicle_diagnostics(vehicle, now)
+            for vehicle in coordinator.vehicles.values()
+        ],
+    }
+
+
+def _vehicle_diagnostics(vehicle: NiuVehicle, now: datetime) -> dict[str, Any]:
+    """Return the polling state of a vehicle, without its serial number."""
+    cache = vehicle.cache
+    endpoints = {}
+    for endpoint in vehicle.scheduler.intervals:
+        age = cache.age(endpoint, now)
+        error = cache.error(endpoint)
+        breaker = vehicle.breakers[endpoint]
+        endpoints[endpoint] = {
+            "age": age.total_seconds() if age is not None else None,
+            "ttl": cache.ttl(endpoint).total_seconds(),
+            "max_stale": cache.max_stale(endpoint).total_seconds(),
+            "fresh": cache.is_fresh(endpoint, now),
+            "servable": cache.is_servable(endpoint, now),
+            "error": repr(error) if error is not None else None,
+            "circuit": breaker.state,
+            "failures": breaker.failures,
+            "circuit_open_until": breaker.open_until,
+        }
+    return {
+        "scooter_id": vehicle.scooter_id,
+        "ride_mode": vehicle.ride_mode.mode,
+        "endpoints": endpoints,
+    }
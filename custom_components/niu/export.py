@@ -0,0 +1,263 @@
+"""Export of NIU ride history to GPX and GeoJSON files."""
+
+from __future__ import annotations
+
+from bisect import bisect_left
+from collections.abc import AsyncIterator, Iterator
+from datetime import UTC, datetime, timedelta
+from functools import partial
+import json
+import logging
+import os
+
+import voluptuous as vol
+
+from homeassistant.config_entries import ConfigEntryState
+from homeassistant.core import (
+    HomeAssistant,
+    ServiceCall,
+    ServiceResponse,
+    SupportsResponse,
+    callback,
+)
+from homeassistant.exceptions import HomeAssistantError, ServiceValidationError
+import homeassistant.helpers.config_validation as cv
+
+from .api import NiuAuthError, NiuConnectionError
+from .const import DOMAIN
+from .coordinator import NiuDataCoordinator
+from .points import TrackPoints
+from .tracks import TrackRecord, local_day_ms
+
+_LOGGER = logging.getLogger(__name__)
+
+SERVICE_EXPORT_TRACKS = "export_tracks"
+
+ATTR_SERIAL_NUMBER = "serial_number"
+ATTR_PATH = "path"
+ATTR_START = "start"
+ATTR_END = "end"
+ATTR_FORMAT = "format"
+
+FORMAT_GPX = "gpx"
+FORMAT_GEOJSON = "geojson"
+
+# Points per written chunk
+EXPORT_CHUNK_POINTS = 500
+
+EXPORT_TRACKS_SCHEMA = vol.Schema(
+    {
+        vol.Required(ATTR_SERIAL_NUMBER): cv.string,
+        vol.Required(ATTR_PATH): cv.string,
+        vol.Optional(ATTR_START): cv.date,
+        vol.Optional(ATTR_END): cv.date,
+        vol.Optional(ATTR_FORMAT, default=FORMAT_GPX): vol.In(
+            [FORMAT_GPX, FORMAT_GEOJSON]
+        ),
+    }
+)
+
+
+@callback
+def async_setup_services(hass: HomeAssistant) -> None:
+    """Register the NIU services."""
+
+    async def _async_export_tracks(call: ServiceCall) -> ServiceResponse:
+        """Write the rides of a scooter in a date range to a file."""
+        path = call.data[ATTR_PATH]
+        if not hass.config.is_allowed_path(path):
+            raise ServiceValidationError(f"Writing to {path} is not allowed")
+
+        sn = call.data[ATTR_SERIAL_NUMBER]
+        coordinator = _find_coordinator(hass, sn)
+        start = call.data.get(ATTR_START)
+        end = call.data.get(ATTR_END)
+        start_ms = local_day_ms(start) if start else 0
+        end_ms = local_day_ms(end + timedelta(days=1)) - 1 if end else 2**63 - 1
+
+        try:
+            tracks = await _async_select_tracks(coordinator, sn, start_ms, end_ms)
+            if call.data[ATTR_FORMAT] == FORMAT_GEOJSON:
+                chunks = _geojson_chunks(_async_track_points(coordinator, sn, tracks))
+            else:
+                chunks = _gpx_chunks(_async_track_points(coordinator, sn, tracks))
+            await _async_write(hass, path, chunks)
+        except (NiuAuthError, NiuConnectionError) as err:
+            raise HomeAssistantError(f"Failed to export tracks of {sn}: {err}") from err
+
+        _LOGGER.debug("Exported %d tracks of %s to %s", len(tracks), sn, path)
+        return {"tracks": len(tracks)}
+
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_EXPORT_TRACKS,
+        _async_export_tracks,
+        schema=EXPORT_TRACKS_SCHEMA,
+        supports_response=SupportsResponse.OPTIONAL,
+    )
+
+
+def _find_coordinator(hass: HomeAssistant, sn: str) -> NiuDataCoordinator:
+    """Return the coordinator of a loaded entry that polls a scooter."""
+    for entry in hass.config_entries.async_entries(DOMAIN):
+        if entry.state is not ConfigEntryState.LOADED:
+            continue
+        coordinator: NiuDataCoordinator = entry.runtime_data.coordinator
+        if sn in coordinator.track_histories:
+            return coordinator
+    raise ServiceValidationError(f"No loaded NIU scooter has serial number {sn}")
+
+
+async def _async_select_tracks(
+    coordinator: NiuDataCoordinator, sn: str, start_ms: int, end_ms: int
+) -> list[TrackRecord]:
+    """Bring the ride history up to date and return the rides in a range."""
+    history = coordinator.track_histories[sn]
+    token = await coordinator.account.async_get_token()
+    await history.async_sync(coordinator.api.iter_track_pages(sn, token))
+    await history.async_backfill(partial(coordinator.api.iter_track_pages, sn, token))
+    tracks = await history.async_load()
+    first = bisect_left(tracks, start_ms, key=lambda track: track.start_time)
+    last = bisect_left(tracks, end_ms + 1, key=lambda track: track.start_time)
+    return tracks[first:last]
+
+
+async def _async_track_points(
+    coordinator: NiuDataCoordinator, sn: str, tracks: list[TrackRecord]
+) -> AsyncIterator[tuple[TrackRecord, TrackPoints]]:
+    """Yield each ride with its points, one ride in memory at a time.
+
+    Points come from the local point store when it is enabled and are
+    downloaded otherwise.
+    """
+    store = coordinator.track_points.get(sn)
+    for track in tracks:
+        if store is not None:
+            points = await store.async_query(
+                track.start_time, track.end_time or track.start_time
+            )
+        elif track.track_id:
+            token = await coordinator.account.async_get_token()
+            payload = await coordinator.api.get_track_detail(
+                sn, token, track.track_id, track.start_time
+            )
+            try:
+                points = TrackPoints.from_api(payload)
+            except (KeyError, TypeError, ValueError) as err:
+                _LOGGER.warning(
+                    "Exporting track %s of %s without points: %s",
+                    track.track_id,
+                    sn,
+                    err,
+                )
+                points = TrackPoints()
+        else:
+            points = TrackPoints()
+        yield track, points
+
+
+def _iso(ms: int | None) -> str | None:
+    """Format epoch milliseconds as an ISO 8601 UTC time."""
+    if ms is None:
+        return None
+    return (
+        datetime.fromtimestamp(ms / 1000, UTC).isoformat().replace("+00:00", "Z")
+    )
+
+
+def _batches(points: TrackPoints) -> Iterator[range]:
+    """Split the rows of a track into chunk-sized ranges."""
+    for first in range(0, len(points), EXPORT_CHUNK_POINTS):
+        yield range(first, min(first + EXPORT_CHUNK_POINTS, len(points)))
+
+
+async def _gpx_chunks(
+    rides: AsyncIterator[tuple[TrackRecord, TrackPoints]],
+) -> AsyncIterator[str]:
+    """Yield a GPX document in chunks, one track per ride."""
+    yield (
+        '<?xml version="1.0" encoding="UTF-8"?>\n'
+        '<gpx version="1.1" creator="Home Assistant NIU" '
+        'xmlns="http://www.topografix.com/GPX/1/1">\n'
+    )
+    async for track, points in rides:
+        yield f"<trk><name>{_iso(track.start_time)}</name><trkseg>\n"
+        for rows in _batches(points):
+            yield "".join(
+                f'<trkpt lat="{points.lat[row]}" lon="{points.lng[row]}">'
+                f"<time>{_iso(points.ts[row])}</time></trkpt>\n"
+                for row in rows
+            )
+        yield "</trkseg></trk>\n"
+    yield "</gpx>\n"
+
+
+async def _geojson_chunks(
+    rides: AsyncIterator[tuple[TrackRecord, TrackPoints]],
+) -> AsyncIterator[str]:
+    """Yield a GeoJSON FeatureCollection in chunks, one LineString per ride.
+
+    Point times go into a ``coordTimes`` property, as written by common
+    GPX to GeoJSON converters. A ride with fewer than two points makes no
+    line, so its geometry is null.
+    """
+    yield '{"type": "FeatureCollection", "features": [\n'
+    separator = ""
+    async for track, points in rides:
+        if len(points) < 2:
+            yield f'{separator}{{"type": "Feature", "geometry": null'
+        else:
+            yield (
+                f'{separator}{{"type": "Feature", '
+                '"geometry": {"type": "LineString", "coordinates": ['
+            )
+            for rows in _batches(points):
+                yield ("," if rows.start else "") + ",".join(
+                    f"[{points.lng[row]},{points.lat[row]}]" for row in rows
+                )
+            yield "]}"
+        properties = json.dumps(
+            {
+                "track_id": track.track_id,
+                "start_time": _iso(track.start_time),
+                "end_time": _iso(track.end_time),
+                "distance": track.distance,
+                "avespeed": track.avespeed,
+                "ridingtime": track.ridingtime,
+            }
+        )
+        yield f', "properties": {properties[:-1]}, "coordTimes": ['
+        for rows in _batches(points):
+            yield ("," if rows.start else "") + ",".join(
+                f'"{_iso(points.ts[row])}"' for row in rows
+            )
+        yield "]}}"
+        separator = ",\n"
+    yield "\n]}\n"
+
+
+async def _async_write(
+    hass: HomeAssistant, path: str, chunks: AsyncIterator[str]
+) -> None:
+    """Write chunks to a file as they are produced.
+
+    The file is written next to its final path and only renamed into place
+    once complete.
+    """
+    part_path = f"{path}.part"
+    file = await hass.async_add_executor_job(_open, part_path)
+    try:
+        async for chunk in chunks:
+            await hass.async_add_executor_job(file.write, chunk)
+    except BaseException:
+        await hass.async_add_executor_job(file.close)
+        await hass.async_add_executor_job(os.remove, part_path)
+        raise
+    await hass.async_add_executor_job(file.close)
+    await hass.async_add_executor_job(os.replace, part_path, path)
+
+
+def _open(path: str):
+    """Open a file for writing text, creating its directory."""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    return open(path, "w", encoding="utf-8")
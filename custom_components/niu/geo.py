@@ -0,0 +1,191 @@
+"""Coordinate conversion between GCJ-02 and WGS-84.
+
+NIU reports positions in GCJ-02, the obfuscated datum used in mainland
+China. ``gcj02_to_wgs84`` converts one point; ``gcj02_to_wgs84_batch``
+converts whole tracks at once, with NumPy when it is available.
+``simplify_polyline`` thins converted tracks before they are stored.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Sequence
+import math
+from types import ModuleType
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - NumPy ships with Home Assistant
+    np = None
+
+PI = 3.1415926535897932384626  # 圆周率
+ee = 0.00669342162296594323  # 偏心率平方
+a = 6378245.0  # 长半轴
+
+# Mean earth radius in metres, for simplification tolerances
+EARTH_RADIUS = 6371008.8
+
+# Below this many points the per-call overhead of NumPy outweighs its gain
+NUMPY_MIN_POINTS = 32
+
+# The precise inverse stops once a step moves less than this many degrees
+# (about a millimetre) or after this many steps
+PRECISE_TOLERANCE = 1e-8
+PRECISE_MAX_ITERATIONS = 10
+
+
+def _offset(lng, lat, m: ModuleType):
+    """Return the GCJ-02 offset ``(dlng, dlat)`` at a WGS-84 position.
+
+    ``m`` is ``math`` for scalars or ``numpy`` for arrays; the formula is
+    the same for both.
+    """
+    x = lng - 105.0
+    y = lat - 35.0
+    # Term shared by both axes
+    shared = (20.0 * m.sin(6.0 * x * PI) + 20.0 * m.sin(2.0 * x * PI)) * 2.0 / 3.0
+
+    dlat = -100.0 + 2.0 * x + 3.0 * y + 0.2 * y * y + 0.1 * x * y + 0.2 * m.sqrt(abs(x))
+    dlat += shared
+    dlat += (20.0 * m.sin(y * PI) + 40.0 * m.sin(y / 3.0 * PI)) * 2.0 / 3.0
+    dlat += (160.0 * m.sin(y / 12.0 * PI) + 320 * m.sin(y * PI / 30.0)) * 2.0 / 3.0
+
+    dlng = 300.0 + x + 2.0 * y + 0.1 * x * x + 0.1 * x * y + 0.1 * m.sqrt(abs(x))
+    dlng += shared
+    dlng += (20.0 * m.sin(x * PI) + 40.0 * m.sin(x / 3.0 * PI)) * 2.0 / 3.0
+    dlng += (150.0 * m.sin(x / 12.0 * PI) + 300.0 * m.sin(x / 30.0 * PI)) * 2.0 / 3.0
+
+    radlat = lat / 180.0 * PI
+    magic = m.sin(radlat)
+    magic = 1 - ee * magic * magic
+    sqrtmagic = m.sqrt(magic)
+    dlat = (dlat * 180.0) / ((a * (1 - ee)) / (magic * sqrtmagic) * PI)
+    dlng = (dlng * 180.0) / (a / sqrtmagic * m.cos(radlat) * PI)
+    return dlng, dlat
+
+
+def out_of_china(lng, lat):
+    """Return True if a position is outside the area GCJ-02 applies to."""
+    return not (73.66 < lng < 135.05 and 3.86 < lat < 53.55)
+
+
+def _convert(lng: float, lat: float, precise: bool) -> tuple[float, float]:
+    """Convert one point, which must be inside China."""
+    dlng, dlat = _offset(lng, lat, math)
+    wgs_lng, wgs_lat = lng - dlng, lat - dlat
+    if precise:
+        # Refine until the forward transform of the estimate hits the input
+        for _ in range(PRECISE_MAX_ITERATIONS):
+            dlng, dlat = _offset(wgs_lng, wgs_lat, math)
+            next_lng, next_lat = lng - dlng, lat - dlat
+            step = max(abs(next_lng - wgs_lng), abs(next_lat - wgs_lat))
+            wgs_lng, wgs_lat = next_lng, next_lat
+            if step < PRECISE_TOLERANCE:
+                break
+    return wgs_lng, wgs_lat
+
+
+def gcj02_to_wgs84(lng, lat, *, precise: bool = False) -> tuple[float, float]:
+    """Convert one GCJ-02 position to WGS-84.
+
+    The default single-step inverse is accurate to a few metres; with
+    ``precise`` it is refined iteratively to below a millimetre.
+    """
+    lng = float(lng)
+    lat = float(lat)
+    if out_of_china(lng, lat):
+        return lng, lat
+    return _convert(lng, lat, precise)
+
+
+def gcj02_to_wgs84_batch(
+    lngs: Sequence[float], lats: Sequence[float], *, precise: bool = False
+) -> tuple[list[float], list[float]]:
+    """Convert columns of GCJ-02 longitudes and latitudes to WGS-84.
+
+    Points outside China are returned unchanged, as by ``gcj02_to_wgs84``.
+    """
+    if len(lngs) != len(lats):
+        raise ValueError("lngs and lats differ in length")
+    if np is not None and len(lngs) >= NUMPY_MIN_POINTS:
+        return _convert_numpy(lngs, lats, precise)
+
+    out_lngs: list[float] = []
+    out_lats: list[float] = []
+    for lng, lat in zip(lngs, lats):
+        lng, lat = gcj02_to_wgs84(lng, lat, precise=precise)
+        out_lngs.append(lng)
+        out_lats.append(lat)
+    return out_lngs, out_lats
+
+
+def _convert_numpy(
+    lngs: Sequence[float], lats: Sequence[float], precise: bool
+) -> tuple[list[float], list[float]]:
+    """Vectorized ``gcj02_to_wgs84_batch``."""
+    lng = np.asarray(lngs, dtype=np.float64)
+    lat = np.asarray(lats, dtype=np.float64)
+    inside = (lng > 73.66) & (lng < 135.05) & (lat > 3.86) & (lat < 53.55)
+
+    dlng, dlat = _offset(lng, lat, np)
+    wgs_lng, wgs_lat = lng - dlng, lat - dlat
+    if precise:
+        for _ in range(PRECISE_MAX_ITERATIONS):
+            dlng, dlat = _offset(wgs_lng, wgs_lat, np)
+            next_lng, next_lat = lng - dlng, lat - dlat
+            step = np.maximum(
+                np.abs(next_lng - wgs_lng), np.abs(next_lat - wgs_lat)
+            )
+            wgs_lng, wgs_lat = next_lng, next_lat
+            if not step[inside].size or step[inside].max() < PRECISE_TOLERANCE:
+                break
+
+    wgs_lng = np.where(inside, wgs_lng, lng)
+    wgs_lat = np.where(inside, wgs_lat, lat)
+    return wgs_lng.tolist(), wgs_lat.tolist()
+
+
+def simplify_polyline(
+    lngs: Sequence[float], lats: Sequence[float], tolerance: float
+) -> list[int]:
+    """Return the indices of the points kept by Douglas-Peucker simplification.
+
+    ``tolerance`` is the largest distance in metres a dropped point may lie
+    from the simplified line. The first and last points are always kept;
+    a tolerance of 0 keeps every point.
+    """
+    count = len(lats)
+    if count < 3 or tolerance <= 0:
+        return list(range(count))
+
+    # Project to metres on a plane tangent at the track; tracks are short
+    # enough for this to be exact to well below any useful tolerance
+    ky = EARTH_RADIUS * PI / 180.0
+    kx = ky * math.cos(sum(lats) / count * PI / 180.0)
+    xs = [lng * kx for lng in lngs]
+    ys = [lat * ky for lat in lats]
+
+    keep = [False] * count
+    keep[0] = keep[-1] = True
+    limit = tolerance * tolerance
+    stack = [(0, count - 1)]
+    while stack:
+        first, last = stack.pop()
+        ax, ay = xs[first], ys[first]
+        dx, dy = xs[last] - ax, ys[last] - ay
+        length = dx * dx + dy * dy
+        farthest, farthest_distance = first, -1.0
+        for index in range(first + 1, last):
+            px, py = xs[index] - ax, ys[index] - ay
+            if length:
+                t = min(1.0, max(0.0, (px * dx + py * dy) / length))
+                px -= t * dx
+                py -= t * dy
+            distance = px * px + py * py
+            if distance > farthest_distance:
+                farthest, farthest_distance = index, distance
+        if farthest_distance > limit:
+            keep[farthest] = True
+            stack.append((first, farthest))
+            stack.append((farthest, last))
+
+    return [index for index, kept in enumerate(keep) if kept]
@@ -0,0 +1,240 @@
+"""Parsed snapshots of the NIU API responses.
+
+Each response is converted once when it arrives. Only the fields that
+sensors read are kept, already in the form the sensors report them.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from datetime import datetime
+from time import gmtime, strftime
+from typing import Any, ClassVar
+
+from .geo import gcj02_to_wgs84
+
+
+def _fields_from(payload: dict[str, Any], api_fields: dict[str, str]) -> dict[str, Any]:
+    """Pick the mapped API fields of a payload as keyword arguments."""
+    return {attr: payload.get(field) for field, attr in api_fields.items()}
+
+
+@dataclass(frozen=True, slots=True)
+class BatterySnapshot:
+    """Battery compartment A from ``battery_info``."""
+
+    # API field name -> attribute name
+    API_FIELDS: ClassVar[dict[str, str]] = {
+        "batteryCharging": "charge",
+        "chargedTimes": "charged_times",
+        "temperature": "temperature",
+        "temperatureDesc": "temperature_desc",
+        "gradeBattery": "grade",
+        "bmsId": "bms_id",
+    }
+
+    charge: Any
+    charged_times: Any
+    temperature: Any
+    temperature_desc: Any
+    grade: Any
+    bms_id: Any
+
+    @classmethod
+    def from_payload(cls, payload: dict[str, Any]) -> BatterySnapshot | None:
+        """Parse a ``battery_info`` response."""
+        if not payload or "data" not in payload:
+            return None
+        battery = payload["data"]["batteries"]["compartmentA"]
+        return cls(**_fields_from(battery, cls.API_FIELDS))
+
+
+@dataclass(frozen=True, slots=True)
+class PositionSnapshot:
+    """Scooter position, converted to WGS-84 where possible."""
+
+    lat: Any
+    lng: Any
+
+    @classmethod
+    def from_payload(cls, position: dict[str, Any]) -> PositionSnapshot:
+        """Parse the ``postion`` object of ``index_info``."""
+        lat = position.get("lat")
+        lng = position.get("lng")
+        if lat is not None and lng is not None and float(lat) != 0.0 and float(lng) != 0.0:
+            lng, lat = gcj02_to_wgs84(lng, lat)
+        return cls(lat=lat, lng=lng)
+
+
+@dataclass(frozen=True, slots=True)
+class LastTrackSnapshot:
+    """The ``lastTrack`` summary of ``index_info``."""
+
+    API_FIELDS: ClassVar[dict[str, str]] = {
+        "distance": "distance",
+        "ridingTime": "riding_time",
+        "time": "time",
+    }
+
+    distance: Any
+    riding_time: Any
+    time: Any
+
+
+@dataclass(frozen=True, slots=True)
+class MotorSnapshot:
+    """Live scooter state from ``index_info``."""
+
+    API_FIELDS: ClassVar[dict[str, str]] = {
+        "isConnected": "is_connected",
+        "nowSpeed": "now_speed",
+        "isCharging": "is_charging",
+        "lockStatus": "lock_status",
+        "leftTime": "left_time",
+        "estimatedMileage": "estimated_mileage",
+        "centreCtrlBattery": "centre_ctrl_battery",
+        "hdop": "hdop",
+        "gsm": "gsm",
+        "gps": "gps",
+    }
+
+    is_connected: Any
+    now_speed: Any
+    is_charging: Any
+    lock_status: Any
+    left_time: Any
+    estimated_mileage: Any
+    centre_ctrl_battery: Any
+    hdop: Any
+    gsm: Any
+    gps: Any
+    position: PositionSnapshot | None
+    last_track: LastTrackSnapshot | None
+
+    @classmethod
+    def from_payload(cls, payload: dict[str, Any]) -> MotorSnapshot | None:
+        """Parse an ``index_info`` response."""
+        if not payload or "data" not in payload:
+            return None
+        data = payload["data"]
+        position = data.get("postion")
+        last_track = data.get("lastTrack")
+        return cls(
+            **_fields_from(data, cls.API_FIELDS),
+            position=(
+                PositionSnapshot.from_payload(position) if position is not None else None
+            ),
+            last_track=(
+                LastTrackSnapshot(**_fields_from(last_track, LastTrackSnapshot.API_FIELDS))
+                if last_track is not None
+                else None
+            ),
+        )
+
+
+@dataclass(frozen=True, slots=True)
+class OverallSnapshot:
+    """Lifetime totals from ``overallTally``."""
+
+    API_FIELDS: ClassVar[dict[str, str]] = {
+        "totalMileage": "total_mileage",
+        "bindDaysCount": "bind_days_count",
+    }
+
+    total_mileage: Any
+    bind_days_count: Any
+
+    @classmethod
+    def from_payload(cls, payload: dict[str, Any]) -> OverallSnapshot | None:
+        """Parse an ``overallTally`` response."""
+        if not payload or "data" not in payload:
+            return None
+        return cls(**_fields_from(payload["data"], cls.API_FIELDS))
+
+
+@dataclass(frozen=True, slots=True)
+class TrackSnapshot:
+    """The most recent ride from ``track/list/v2``, formatted for display."""
+
+    API_FIELDS: ClassVar[dict[str, str]] = {
+        "startTime": "start_time",
+        "endTime": "end_time",
+        "distance": "distance",
+        "avespeed": "avespeed",
+        "ridingtime": "ridingtime",
+        "track_thumb": "track_thumb",
+    }
+
+    start_time: str | None
+    end_time: str | None
+    distance: Any
+    avespeed: Any
+    ridingtime: str | None
+    track_thumb: str | None
+
+    @classmethod
+    def from_payload(cls, payload: dict[str, Any]) -> TrackSnapshot | None:
+        """Parse a ``track/list/v2`` response."""
+        if not payload or "data" not in payload or not payload["data"]:
+            return None
+        track = payload["data"][0]
+        return cls(
+            start_time=_format_timestamp(track.get("startTime")),
+            end_time=_format_timestamp(track.get("endTime")),
+            distance=track.get("distance"),
+            avespeed=track.get("avespeed"),
+            ridingtime=(
+                strftime("%H:%M:%S", gmtime(track["ridingtime"]))
+                if track.get("ridingtime") is not None
+                else None
+            ),
+            track_thumb=(
+                track["track_thumb"].replace("app-api.niucache.com", "app-api.niu.com")
+                if track.get("track_thumb")
+                else None
+            ),
+        )
+
+
+def _format_timestamp(value: Any) -> str | None:
+    """Format a millisecond timestamp in local time."""
+    if value is None:
+        return None
+    return datetime.fromtimestamp(value / 1000).strftime("%Y-%m-%d %H:%M:%S")
+
+
+@dataclass(frozen=True, slots=True)
+class TripTotals:
+    """Rides of one calendar period, summed from the local ride history."""
+
+    count: int = 0
+    # Metres and seconds, as reported per ride by ``track/list/v2``
+    distance: float = 0.0
+    riding_time: float = 0.0
+
+    @property
+    def average_speed(self) -> float | None:
+        """Return the average riding speed in km/h."""
+        if not self.riding_time:
+            return None
+        return round(self.distance / self.riding_time * 3.6, 1)
+
+
+@dataclass(frozen=True, slots=True)
+class TripSummary:
+    """Ride totals of the current day, week and month."""
+
+    today: TripTotals = TripTotals()
+    week: TripTotals = TripTotals()
+    month: TripTotals = TripTotals()
+
+
+@dataclass(frozen=True, slots=True)
+class VehicleSnapshot:
+    """Everything known about one scooter after a refresh."""
+
+    battery: BatterySnapshot | None = None
+    motor: MotorSnapshot | None = None
+    overall: OverallSnapshot | None = None
+    track: TrackSnapshot | None = None
+    trips: TripSummary | None = None
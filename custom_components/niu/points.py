@@ -0,0 +1,216 @@
+"""Columnar on-disk store of the GPS points of NIU tracks.
+
+Every scooter has one binary file per column, holding fixed-width native
+values. Rows are appended in time order, so the timestamp column doubles as
+the time index: range queries binary-search it through a memory map and
+only read the rows they return.
+"""
+
+from __future__ import annotations
+
+from array import array
+import asyncio
+from bisect import bisect_left, bisect_right
+from dataclasses import dataclass, field
+import logging
+import math
+import mmap
+import os
+from pathlib import Path
+from typing import Any
+
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.storage import Store
+
+from .const import DOMAIN
+from .geo import gcj02_to_wgs84_batch, simplify_polyline
+from .tracks import TrackRecord
+
+_LOGGER = logging.getLogger(__name__)
+
+POINTS_DIRECTORY = f"{DOMAIN}_points"
+POINTS_STORAGE_VERSION = 1
+POINTS_SAVE_DELAY = 10
+
+# Column name -> array typecode: epoch milliseconds, WGS-84 degrees, km/h
+COLUMNS = {"ts": "q", "lat": "d", "lng": "d", "speed": "f"}
+
+
+@dataclass(slots=True)
+class TrackPoints:
+    """GPS points as parallel columns, oldest first."""
+
+    ts: list[int] = field(default_factory=list)
+    lat: list[float] = field(default_factory=list)
+    lng: list[float] = field(default_factory=list)
+    speed: list[float] = field(default_factory=list)
+
+    def __len__(self) -> int:
+        """Return the number of points."""
+        return len(self.ts)
+
+    def simplified(self, tolerance: float) -> TrackPoints:
+        """Return the points kept by simplifying the track to ``tolerance`` metres."""
+        keep = simplify_polyline(self.lng, self.lat, tolerance)
+        if len(keep) == len(self):
+            return self
+        return TrackPoints(
+            ts=[self.ts[index] for index in keep],
+            lat=[self.lat[index] for index in keep],
+            lng=[self.lng[index] for index in keep],
+            speed=[self.speed[index] for index in keep],
+        )
+
+    @classmethod
+    def from_api(cls, payload: dict[str, Any]) -> TrackPoints:
+        """Parse a ``track/detail`` response, converting to WGS-84.
+
+        Raises KeyError, TypeError or ValueError if the response is malformed.
+        """
+        items = sorted(
+            (item for item in payload["data"]["trackItems"] if item.get("date")),
+            key=lambda item: item["date"],
+        )
+        lngs, lats = gcj02_to_wgs84_batch(
+            [float(item["lng"]) for item in items],
+            [float(item["lat"]) for item in items],
+        )
+        return cls(
+            ts=[int(item["date"]) for item in items],
+            lat=lats,
+            lng=lngs,
+            speed=[
+                float(item["speed"]) if item.get("speed") is not None else math.nan
+                for item in items
+            ],
+        )
+
+
+class NiuTrackPointStore:
+    """GPS points of every downloaded track of one scooter."""
+
+    def __init__(self, hass: HomeAssistant, sn: str) -> None:
+        """Initialize the store."""
+        self.sn = sn
+        self._path = Path(hass.config.path(".storage", POINTS_DIRECTORY, sn))
+        self._hass = hass
+        # Start time of the newest track whose points are stored
+        self._meta: Store[dict[str, Any]] = Store(
+            hass, POINTS_STORAGE_VERSION, f"{DOMAIN}.points.{sn}"
+        )
+        self._synced_until: int | None = None
+        self._meta_loaded = False
+        self._checked = False
+        # File access runs in the executor, one operation at a time
+        self._lock = asyncio.Lock()
+
+    async def async_get_synced_until(self) -> int | None:
+        """Return the start time of the newest track with stored points."""
+        if not self._meta_loaded:
+            data = await self._meta.async_load() or {}
+            self._synced_until = data.get("synced_until")
+            self._meta_loaded = True
+        return self._synced_until
+
+    async def async_add_track(self, track: TrackRecord, points: TrackPoints) -> None:
+        """Append the points of a track newer than all stored ones.
+
+        Runs to completion even if the caller is cancelled, so a write that
+        already reached the files is always recorded as synced.
+        """
+        await asyncio.shield(self._async_add_track(track, points))
+
+    async def _async_add_track(self, track: TrackRecord, points: TrackPoints) -> None:
+        """Append the points of a track and record it as synced."""
+        await self.async_get_synced_until()
+        async with self._lock:
+            if len(points):
+                await self._hass.async_add_executor_job(self._append, points)
+        self._synced_until = track.start_time
+        self._meta.async_delay_save(
+            lambda: {"synced_until": self._synced_until}, POINTS_SAVE_DELAY
+        )
+
+    async def async_query(self, start: int, end: int) -> TrackPoints:
+        """Return the points with timestamps from ``start`` to ``end``."""
+        async with self._lock:
+            return await self._hass.async_add_executor_job(self._query, start, end)
+
+    def _column_path(self, column: str) -> Path:
+        """Return the file of a column."""
+        return self._path / f"{column}.bin"
+
+    def _check(self) -> None:
+        """Cut the columns to a common row count after an interrupted write."""
+        if self._checked:
+            return
+        self._checked = True
+        rows = min(
+            (
+                self._column_path(column).stat().st_size // array(code).itemsize
+                if self._column_path(column).exists()
+                else 0
+            )
+            for column, code in COLUMNS.items()
+        )
+        for column, code in COLUMNS.items():
+            path = self._column_path(column)
+            size = rows * array(code).itemsize
+            if path.exists() and path.stat().st_size != size:
+                _LOGGER.warning("Truncating %s of %s to %d points", column, self.sn, rows)
+                os.truncate(path, size)
+
+    def _append(self, points: TrackPoints) -> None:
+        """Append points to every column."""
+        self._path.mkdir(parents=True, exist_ok=True)
+        self._check()
+        for column, code in COLUMNS.items():
+            with open(self._column_path(column), "ab") as file:
+                file.write(array(code, getattr(points, column)).tobytes())
+
+    def _query(self, start: int, end: int) -> TrackPoints:
+        """Read the rows of a time range through memory maps."""
+        if not self._path.exists():
+            return TrackPoints()
+        self._check()
+
+        ts = self._read_column("ts", None, start, end)
+        if ts is None:
+            return TrackPoints()
+        rows, values = ts
+        return TrackPoints(
+            ts=values,
+            **{
+                column: self._read_column(column, rows)[1]
+                for column in COLUMNS
+                if column != "ts"
+            },
+        )
+
+    def _read_column(
+        self, column: str, rows: slice | None, start: int = 0, end: int = 0
+    ) -> tuple[slice, list[Any]] | None:
+        """Read rows of a column; without rows, find them in the time index."""
+        code = COLUMNS[column]
+        itemsize = array(code).itemsize
+        with open(self._column_path(column), "rb") as file:
+            if os.fstat(file.fileno()).st_size < itemsize:
+                return None
+            with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                view = memoryview(mapped)
+                try:
+                    if rows is None:
+                        index = view.cast(code)
+                        try:
+                            rows = slice(
+                                bisect_left(index, start), bisect_right(index, end)
+                            )
+                        finally:
+                            index.release()
+                    chunk = view[rows.start * itemsize:rows.stop * itemsize].cast(code)
+                    try:
+                        return rows, chunk.tolist()
+                    finally:
+                        chunk.release()
+                finally:
+                    view.release()
@@ -0,0 +1,155 @@
+"""Request budgets shared by every NIU API client in Home Assistant."""
+
+from __future__ import annotations
+
+import asyncio
+from collections import Counter, deque
+from contextvars import ContextVar
+from typing import Any
+
+from homeassistant.core import HomeAssistant, callback
+
+from .const import (
+    DATA_RATE_LIMITER,
+    DOMAIN,
+    RATE_LIMIT_DATA_BURST,
+    RATE_LIMIT_DATA_RATE,
+    RATE_LIMIT_LOGIN_BURST,
+    RATE_LIMIT_LOGIN_RATE,
+)
+
+# Who a request is queued for; coordinators set their entry ID, other
+# callers are queued per account
+rate_limit_key: ContextVar[str | None] = ContextVar(
+    "niu_rate_limit_key", default=None
+)
+
+
+class TokenBucket:
+    """Async token bucket with round-robin queuing between keys.
+
+    Tokens accumulate at ``rate`` per second up to ``burst``. A request
+    takes one token and waits if there is none. Waiting requests are served
+    one key at a time in turn, so a key with many queued requests cannot
+    starve the others.
+    """
+
+    def __init__(self, rate: float, burst: int) -> None:
+        """Initialize a full bucket."""
+        self._rate = rate
+        self._burst = burst
+        self._tokens = float(burst)
+        self._updated: float | None = None
+        # Waiting requests per key, and the keys with waiters in serving order
+        self._queues: dict[str, deque[asyncio.Future[None]]] = {}
+        self._order: deque[str] = deque()
+        self._timer: asyncio.TimerHandle | None = None
+
+        self.requests = 0
+        self.throttled = 0
+        self.throttled_time = 0.0
+        self.throttled_time_by_key: Counter[str] = Counter()
+
+    async def async_acquire(self, key: str) -> None:
+        """Take a token, waiting for one in ``key``'s turn if needed."""
+        loop = asyncio.get_running_loop()
+        self.requests += 1
+        if not self._order and self._take(loop.time()):
+            return
+
+        future: asyncio.Future[None] = loop.create_future()
+        if key not in self._queues:
+            self._queues[key] = deque()
+            self._order.append(key)
+        self._queues[key].append(future)
+        self._schedule(loop)
+
+        started = loop.time()
+        try:
+            await future
+        finally:
+            waited = loop.time() - started
+            self.throttled += 1
+            self.throttled_time += waited
+            self.throttled_time_by_key[key] += waited
+
+    def stats(self) -> dict[str, Any]:
+        """Return the request and throttling counters."""
+        return {
+            "requests": self.requests,
+            "throttled": self.throttled,
+            "throttled_time": round(self.throttled_time, 3),
+            "waiting": sum(len(queue) for queue in self._queues.values()),
+        }
+
+    def _refill(self, now: float) -> None:
+        """Add the tokens accumulated since the last refill."""
+        if self._updated is not None:
+            self._tokens = min(
+                self._burst, self._tokens + (now - self._updated) * self._rate
+            )
+        self._updated = now
+
+    def _take(self, now: float) -> bool:
+        """Take a token if one is available."""
+        self._refill(now)
+        if self._tokens < 1:
+            return False
+        self._tokens -= 1
+        return True
+
+    def _schedule(self, loop: asyncio.AbstractEventLoop) -> None:
+        """Wake the queue when the next token is due."""
+        if self._timer is not None:
+            return
+        self._refill(loop.time())
+        delay = max(0.0, (1 - self._tokens) / self._rate)
+        self._timer = loop.call_later(delay, self._release, loop)
+
+    def _release(self, loop: asyncio.AbstractEventLoop) -> None:
+        """Hand the available tokens to the waiting keys in turn."""
+        self._timer = None
+        now = loop.time()
+        while self._order:
+            key = self._order[0]
+            queue = self._queues[key]
+            # Requests cancelled while waiting give up their place
+            while queue and queue[0].done():
+                queue.popleft()
+            if not queue:
+                del self._queues[key]
+                self._order.popleft()
+                continue
+            if not self._take(now):
+                self._schedule(loop)
+                return
+            queue.popleft().set_result(None)
+            self._order.rotate(-1)
+
+
+class NiuRateLimiter:
+    """Login and data request budgets for all NIU accounts and entries."""
+
+    def __init__(self) -> None:
+        """Initialize the budgets."""
+        self.login = TokenBucket(RATE_LIMIT_LOGIN_RATE, RATE_LIMIT_LOGIN_BURST)
+        self.data = TokenBucket(RATE_LIMIT_DATA_RATE, RATE_LIMIT_DATA_BURST)
+
+    def stats(self, key: str) -> dict[str, Any]:
+        """Return the counters of both budgets and the time ``key`` waited."""
+        return {
+            name: {
+                **bucket.stats(),
+                "throttled_time_of_key": round(bucket.throttled_time_by_key[key], 3),
+            }
+            for name, bucket in (("login", self.login), ("data", self.data))
+        }
+
+
+@callback
+def async_get_rate_limiter(hass: HomeAssistant) -> NiuRateLimiter:
+    """Return the rate limiter shared by all NIU API clients."""
+    domain_data = hass.data.setdefault(DOMAIN, {})
+    if DATA_RATE_LIMITER not in domain_data:
+        domain_data[DATA_RATE_LIMITER] = NiuRateLimiter()
+    return domain_data[DATA_RATE_LIMITER]
@@ -0,0 +1,111 @@
+"""Retries and circuit breakers around the NIU API."""
+
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Awaitable, Callable
+from datetime import datetime, timedelta
+import logging
+import random
+from typing import TypeVar
+
+from .api import NiuConnectionError, NiuTransientError
+
+_LOGGER = logging.getLogger(__name__)
+
+_T = TypeVar("_T")
+
+# Tries per call on transient errors, and the exponential backoff between
+# them in seconds, before jitter
+RETRY_ATTEMPTS = 3
+RETRY_BASE_DELAY = 1.0
+RETRY_MAX_DELAY = 8.0
+
+# Consecutive failures that open a circuit, and how long it stays open;
+# each failed trial call doubles the time up to the maximum
+FAILURE_THRESHOLD = 3
+OPEN_COOLDOWN = timedelta(minutes=1)
+MAX_OPEN_COOLDOWN = timedelta(minutes=30)
+# Relative spread of the open time, so instances do not retry in step
+COOLDOWN_JITTER = 0.2
+
+
+class NiuCircuitOpenError(NiuConnectionError):
+    """Exception raised instead of calling an endpoint whose circuit is open."""
+
+
+def backoff_delay(attempt: int) -> float:
+    """Return the delay before retry ``attempt``, with full jitter."""
+    return random.uniform(0, min(RETRY_MAX_DELAY, RETRY_BASE_DELAY * 2**attempt))
+
+
+async def async_retry(call: Callable[[], Awaitable[_T]], what: str) -> _T:
+    """Await a call, retrying it with backoff while it fails transiently.
+
+    Other errors, including rejected tokens, are raised at once.
+    """
+    for attempt in range(RETRY_ATTEMPTS - 1):
+        try:
+            return await call()
+        except NiuTransientError as err:
+            delay = backoff_delay(attempt)
+            _LOGGER.debug("Retrying %s in %.1fs: %s", what, delay, err)
+            await asyncio.sleep(delay)
+    return await call()
+
+
+class CircuitBreaker:
+    """Stop calling an endpoint that keeps failing.
+
+    After FAILURE_THRESHOLD consecutive failures the circuit opens and
+    calls are refused for a jittered cooldown. Then a single trial call is
+    let through: success closes the circuit at once, failure opens it again
+    for twice as long, up to MAX_OPEN_COOLDOWN.
+    """
+
+    def __init__(self) -> None:
+        """Initialize a closed circuit."""
+        self.failures = 0
+        self._open_until: datetime | None = None
+        self._cooldown = OPEN_COOLDOWN
+        self._trial = False
+
+    @property
+    def state(self) -> str:
+        """Return ``closed``, ``open`` or ``half_open`` during a trial call."""
+        if self._open_until is None:
+            return "closed"
+        return "half_open" if self._trial else "open"
+
+    def allow(self, now: datetime) -> bool:
+        """Return whether a call may be made now."""
+        if self._open_until is None:
+            return True
+        if self._trial or now < self._open_until:
+            return False
+        self._trial = True
+        return True
+
+    def record_success(self) -> None:
+        """Close the circuit after a successful call."""
+        self.failures = 0
+        self._open_until = None
+        self._cooldown = OPEN_COOLDOWN
+        self._trial = False
+
+    def record_failure(self, now: datetime) -> None:
+        """Count a failed call, opening the circuit if it keeps failing."""
+        self.failures += 1
+        if self._trial:
+            self._cooldown = min(self._cooldown * 2, MAX_OPEN_COOLDOWN)
+        elif self.failures < FAILURE_THRESHOLD:
+            return
+        self._trial = False
+        self._open_until = now + self._cooldown * random.uniform(
+            1 - COOLDOWN_JITTER, 1 + COOLDOWN_JITTER
+        )
+
+    @property
+    def open_until(self) -> datetime | None:
+        """Return when the next trial call may be made, if the circuit is open."""
+        return self._open_until
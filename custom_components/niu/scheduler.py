@@ -0,0 +1,217 @@
+"""Per-endpoint polling schedule for the NIU coordinator."""
+
+from __future__ import annotations
+
+from collections.abc import Iterable
+from datetime import datetime, timedelta
+from enum import StrEnum
+import hashlib
+from typing import Any
+
+# Shortest time the coordinator waits between two refresh cycles
+MIN_REFRESH_INTERVAL = timedelta(seconds=5)
+# Refresh interval used while no endpoint is scheduled at all
+IDLE_REFRESH_INTERVAL = timedelta(minutes=5)
+
+# Delay before refetching an endpoint whose fetch failed; it doubles with
+# every failure in a row, up to the endpoint's interval
+FAILED_RETRY_DELAY = timedelta(seconds=30)
+MAX_FAILED_RETRY_DOUBLINGS = 10
+
+# Shift of a staggered fetch, as a share of the shortest interval and at most
+STAGGER_JITTER = 0.05
+MAX_STAGGER_JITTER = timedelta(seconds=30)
+
+# index_info reports this lockStatus while the scooter is locked
+LOCK_STATUS_LOCKED = 0
+
+
+class EndpointScheduler:
+    """Decide which endpoints are due on a given refresh cycle.
+
+    Every endpoint has its own interval. The coordinator asks for the due set
+    at the start of a cycle, marks the endpoints it attempted, and then sleeps
+    until the earliest endpoint becomes due again.
+
+    With a ``stagger_key``, usually the serial number, fetches are aligned
+    to a fixed phase of each interval derived from the key instead of to
+    the previous fetch, plus a little jitter. Scooters are then polled at
+    different moments, however their entries were set up.
+    """
+
+    def __init__(
+        self, intervals: dict[str, timedelta], stagger_key: str | None = None
+    ) -> None:
+        """Initialize the scheduler with an interval per endpoint."""
+        self._intervals = dict(intervals)
+        self._active = set(intervals)
+        self._next_due: dict[str, datetime] = {}
+        # Failed fetches in a row per endpoint
+        self._failures: dict[str, int] = {}
+        self._stagger_key = stagger_key
+        self._phase = stagger_phase(stagger_key) if stagger_key is not None else None
+
+    @property
+    def intervals(self) -> dict[str, timedelta]:
+        """Return the current interval of every endpoint."""
+        return dict(self._intervals)
+
+    def set_interval(self, endpoint: str, interval: timedelta) -> None:
+        """Change the interval of an endpoint, keeping its last fetch time."""
+        previous = self._intervals.get(endpoint)
+        self._intervals[endpoint] = interval
+        if previous is not None and endpoint in self._next_due:
+            self._next_due[endpoint] += interval - previous
+
+    def set_active(self, endpoints: Iterable[str]) -> None:
+        """Limit scheduling to the given endpoints.
+
+        Inactive endpoints are never due. An endpoint that becomes active
+        again is due as soon as its previous interval has run out.
+        """
+        self._active = set(endpoints) & self._intervals.keys()
+
+    def mark_due(self, endpoint: str) -> None:
+        """Make an endpoint due on the next cycle regardless of its interval."""
+        self._next_due.pop(endpoint, None)
+
+    def due(self, now: datetime) -> set[str]:
+        """Return the endpoints that should be fetched now."""
+        return {
+            endpoint
+            for endpoint in self._active
+            if endpoint not in self._next_due or self._next_due[endpoint] <= now
+        }
+
+    def mark_attempted(self, endpoints: Iterable[str], now: datetime) -> None:
+        """Record that the given endpoints were fetched at ``now``."""
+        for endpoint in endpoints:
+            self._next_due[endpoint] = self._next_slot(now, self._intervals[endpoint])
+
+    def mark_failed(
+        self, endpoint: str, now: datetime, not_before: datetime | None = None
+    ) -> None:
+        """Bring the next fetch of an endpoint that failed at ``now`` forward.
+
+        The retry is never later than the regular next fetch. ``not_before``
+        holds it back, e.g. while the endpoint's circuit is open.
+        """
+        failures = self._failures.get(endpoint, 0) + 1
+        self._failures[endpoint] = failures
+        delay = FAILED_RETRY_DELAY * 2 ** min(failures - 1, MAX_FAILED_RETRY_DOUBLINGS)
+        retry = now + min(delay, self._intervals[endpoint])
+        if not_before is not None:
+            retry = max(retry, not_before)
+        regular = self._next_due.get(endpoint)
+        self._next_due[endpoint] = retry if regular is None else min(retry, regular)
+
+    def mark_succeeded(self, endpoint: str) -> None:
+        """Reset the retry delay of an endpoint after a successful fetch."""
+        self._failures.pop(endpoint, None)
+
+    def next_refresh(self, now: datetime) -> timedelta:
+        """Return how long to wait before the next endpoint becomes due."""
+        if not self._active:
+            return IDLE_REFRESH_INTERVAL
+        if any(endpoint not in self._next_due for endpoint in self._active):
+            return MIN_REFRESH_INTERVAL
+        next_due = min(self._next_due[endpoint] for endpoint in self._active)
+        return max(MIN_REFRESH_INTERVAL, next_due - now)
+
+    def _next_slot(self, now: datetime, interval: timedelta) -> datetime:
+        """Return when an endpoint fetched at ``now`` is due again.
+
+        Staggered, this is the point of the vehicle's phase closest to one
+        interval from now, so the gap stays between half and one and a half
+        intervals. The phase is a share of the shortest interval, so the
+        endpoints of one vehicle whose intervals are multiples of it stay
+        due together. The jitter is derived from the key and the slot of
+        the shortest interval, so it shifts those endpoints alike.
+        """
+        target = now + interval
+        if self._phase is None:
+            return target
+        period = interval.total_seconds()
+        shortest = min(self._intervals.values())
+        offset = self._phase * shortest.total_seconds()
+        slot = offset + round((target.timestamp() - offset) / period) * period
+        index = round((slot - offset) / shortest.total_seconds())
+        jitter = min(shortest * STAGGER_JITTER, MAX_STAGGER_JITTER).total_seconds()
+        shift = (2 * stagger_phase(f"{self._stagger_key}:{index}") - 1) * jitter
+        # From the slot alone, so endpoints due together get equal times
+        return datetime.fromtimestamp(slot + shift, now.tzinfo)
+
+
+def stagger_phase(sn: str) -> float:
+    """Return a scooter's fixed phase in [0, 1), spread evenly over serial numbers."""
+    digest = hashlib.sha256(sn.encode()).digest()
+    return int.from_bytes(digest[:8], "big") / 2**64
+
+
+class PollingMode(StrEnum):
+    """How eagerly a scooter is polled."""
+
+    ACTIVE = "active"
+    NORMAL = "normal"
+    PARKED = "parked"
+
+
+class RideModeTracker:
+    """Derive the polling mode from the motor endpoint's live fields.
+
+    A ride or charge switches to ``ACTIVE`` at once. Leaving a mode is
+    delayed: ``ACTIVE`` is held until no movement or charging has been seen
+    for ``active_hold``, and ``PARKED`` is only entered once the scooter has
+    been locked and still for ``parked_delay``. Short stops at traffic lights
+    therefore do not make the mode flap.
+    """
+
+    def __init__(self, active_hold: timedelta, parked_delay: timedelta) -> None:
+        """Initialize the tracker in normal mode."""
+        self._active_hold = active_hold
+        self._parked_delay = parked_delay
+        self.mode = PollingMode.NORMAL
+        self._last_active: datetime | None = None
+        self._parked_since: datetime | None = None
+
+    def update(self, motor: dict[str, Any], now: datetime) -> bool:
+        """Feed one ``index_info`` payload and return True if the mode changed."""
+        riding = _as_float(motor.get("nowSpeed")) > 0
+        charging = bool(motor.get("isCharging"))
+        locked = motor.get("lockStatus") == LOCK_STATUS_LOCKED
+
+        if riding or charging:
+            self._last_active = now
+        if locked and not riding and not charging:
+            if self._parked_since is None:
+                self._parked_since = now
+        else:
+            self._parked_since = None
+
+        if riding or charging:
+            mode = PollingMode.ACTIVE
+        elif (
+            self.mode is PollingMode.ACTIVE
+            and self._last_active is not None
+            and now - self._last_active < self._active_hold
+        ):
+            mode = PollingMode.ACTIVE
+        elif (
+            self._parked_since is not None
+            and now - self._parked_since >= self._parked_delay
+        ):
+            mode = PollingMode.PARKED
+        else:
+            mode = PollingMode.NORMAL
+
+        changed = mode is not self.mode
+        self.mode = mode
+        return changed
+
+
+def _as_float(value: Any) -> float:
+    """Convert an API number to float, treating missing values as zero."""
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return 0.0
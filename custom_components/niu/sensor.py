@@ -2,278 +2,383 @@
 
 from __future__ import annotations
 
+from collections.abc import Callable
+from dataclasses import dataclass
 import logging
+from operator import attrgetter
 from typing import Any
 
 from homeassistant.components.sensor import (
     SensorDeviceClass,
     SensorEntity,
+    SensorEntityDescription,
     SensorStateClass,
 )
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, callback
 from homeassistant.helpers.entity import DeviceInfo
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 from homeassistant.helpers.typing import StateType
+from homeassistant.util import dt as dt_util
 
 from .const import (
-    AVAILABLE_SENSORS,
     CONF_MONITORED_VARIABLES,
-    CONF_SCOOTER_ID,
     DEFAULT_MONITORED_VARIABLES,
     DOMAIN,
+    ENDPOINT_BATTERY,
     SENSOR_TYPE_BAT,
     SENSOR_TYPE_MOTO,
     SENSOR_TYPE_DIST,
     SENSOR_TYPE_OVERALL,
     SENSOR_TYPE_POS,
+    SENSOR_TYPE_ENDPOINTS,
     SENSOR_TYPE_TRACK,
+    SENSOR_TYPE_TRIPS,
 )
 from .coordinator import NiuDataCoordinator
+from .models import VehicleSnapshot
+from .vehicle import NiuVehicle
 
-import math
+_LOGGER = logging.getLogger(__name__)
 
-PI = 3.1415926535897932384626  # 圆周率
-ee = 0.00669342162296594323  # 偏心率平方
-a = 6378245.0  # 长半轴
+# About 5 m, below the accuracy of the scooter's GPS fix
+POSITION_DEADBAND = 0.00005
+
+
+@dataclass(frozen=True, kw_only=True)
+class NiuSensorEntityDescription(SensorEntityDescription):
+    """Describes a NIU sensor and how to read it from a vehicle snapshot."""
+
+    sensor_id: str
+    sensor_type: str
+    value_fn: Callable[[VehicleSnapshot], StateType]
+    attributes_fn: Callable[[VehicleSnapshot], dict[str, Any]] | None = None
+    # Endpoints read by the attributes besides the sensor type's own
+    extra_endpoints: frozenset[str] = frozenset()
+    # Numeric changes smaller than this are not written to the state machine
+    deadband: float | None = None
+
+
+def _snapshot_value(path: str) -> Callable[[VehicleSnapshot], StateType]:
+    """Compile an accessor for a dotted attribute path of a vehicle snapshot.
+
+    A section that was not fetched yet is None, which reads as None.
+    """
+    getter = attrgetter(path)
+
+    def _value(snapshot: VehicleSnapshot) -> StateType:
+        try:
+            return getter(snapshot)
+        except AttributeError:
+            return None
+
+    return _value
 
-_LOGGER = logging.getLogger(__name__)
 
-SENSOR_TYPES = {
-    "BatteryCharge": [
-        "battery_charge",
-        "%",
-        "batteryCharging",
-        SENSOR_TYPE_BAT,
-        SensorDeviceClass.BATTERY,
-        "mdi:battery-charging-50",
-        SensorStateClass.MEASUREMENT,
-    ],
-    "Isconnected": [
-        "is_connected",
-        "",
-        "isConnected",
-        SENSOR_TYPE_MOTO,
-        None,
-        "mdi:connection",
-        None,
-    ],
-    "TimesCharged": [
-        "times_charged",
-        "x",
-        "chargedTimes",
-        SENSOR_TYPE_BAT,
-        None,
-        "mdi:battery-charging-wireless",
-        SensorStateClass.TOTAL,
-    ],
-    "temperatureDesc": [
-        "temp_descr",
-        "",
-        "temperatureDesc",
-        SENSOR_TYPE_BAT,
-        None,
-        "mdi:thermometer-alert",
-        None,
-    ],
-    "Temperature": [
-        "temperature",
-        "°C",
-        "temperature",
-        SENSOR_TYPE_BAT,
-        SensorDeviceClass.TEMPERATURE,
-        "mdi:thermometer",
-        SensorStateClass.MEASUREMENT,
-    ],
-    "BatteryGrade": [
-        "battery_grade",
-        "%",
-        "gradeBattery",
-        SENSOR_TYPE_BAT,
-        SensorDeviceClass.BATTERY,
-        "mdi:car-battery",
-        SensorStateClass.MEASUREMENT,
-    ],
-    "CurrentSpeed": [
-        "current_speed",
-        "km/h",
-        "nowSpeed",
-        SENSOR_TYPE_MOTO,
-        None,
-        "mdi:speedometer",
-        SensorStateClass.MEASUREMENT,
-    ],
-    "ScooterConnected": [
-        "scooter_connected",
-        "",
-        "isConnected",
-        SENSOR_TYPE_MOTO,
-        None,
-        "mdi:motorbike-electric",
-        None,
-    ],
-    "IsCharging": [
-        "is_charging",
-        "",
-        "isCharging",
-        SENSOR_TYPE_MOTO,
-        None,
-        "mdi:battery-charging",
-        None,
-    ],
-    "IsLocked": [
-        "is_locked",
-        "",
-        "lockStatus",
-        SENSOR_TYPE_MOTO,
-        None,
-        "mdi:lock",
-        None,
-    ],
-    "TimeLeft": [
-        "time_left",
-        "h",
-        "leftTime",
-        SENSOR_TYPE_MOTO,
-        None,
-        "mdi:av-timer",
-        SensorStateClass.MEASUREMENT,
-    ],
-    "EstimatedMileage": [
-        "estimated_mileage",
-        "km",
-        "estimatedMileage",
-        SENSOR_TYPE_MOTO,
-        None,
-        "mdi:map-marker-distance",
-        SensorStateClass.MEASUREMENT,
-    ],
-    "centreCtrlBatt": [
-        "centre_ctrl_batt",
-        "%",
-        "centreCtrlBattery",
-        SENSOR_TYPE_MOTO,
-        SensorDeviceClass.BATTERY,
-        "mdi:car-cruise-control",
-        SensorStateClass.MEASUREMENT,
-    ],
-    "HDOP": [
-        "hdp",
-        "",
-        "hdop",
-        SENSOR_TYPE_MOTO,
-        None,
-        "mdi:map-marker",
-        SensorStateClass.MEASUREMENT,
-    ],
-    "Longitude": [
-        "long",
-        "",
-        "lng",
-        SENSOR_TYPE_POS,
-        None,
-        "mdi:map-marker",
-        SensorStateClass.MEASUREMENT,
-    ],
-    "Latitude": [
-        "lat",
-        "",
-        "lat",
-        SENSOR_TYPE_POS,
-        None,
-        "mdi:map-marker",
-        SensorStateClass.MEASUREMENT,
-    ],
-    "Distance": [
-        "distance",
-        "m",
-        "distance",
-        SENSOR_TYPE_DIST,
-        None,
-        "mdi:map-marker-distance",
-        SensorStateClass.MEASUREMENT,
-    ],
-    "RidingTime": [
-        "riding_time",
-        "s",
-        "ridingTime",
-        SENSOR_TYPE_DIST,
-        None,
-        "mdi:map-clock",
-        SensorStateClass.MEASUREMENT,
-    ],
-    "totalMileage": [
-        "total_mileage",
-        "km",
-        "totalMileage",
-        SENSOR_TYPE_OVERALL,
-        None,
-        "mdi:map-marker-distance",
-        SensorStateClass.TOTAL,
-    ],
-    "DaysInUse": [
-        "bind_days_count",
-        "days",
-        "bindDaysCount",
-        SENSOR_TYPE_OVERALL,
-        None,
-        "mdi:calendar-today",
-        SensorStateClass.TOTAL,
-    ],
-    "LastTrackStartTime": [
-        "last_track_start_time",
-        "",
-        "startTime",
-        SENSOR_TYPE_TRACK,
-        None,
-        "mdi:clock-start",
-        None,
-    ],
-    "LastTrackEndTime": [
-        "last_track_end_time",
-        "",
-        "endTime",
-        SENSOR_TYPE_TRACK,
-        None,
-        "mdi:clock-end",
-        None,
-    ],
-    "LastTrackDistance": [
-        "last_track_distance",
-        "m",
-        "distance",
-        SENSOR_TYPE_TRACK,
-        None,
-        "mdi:map-marker-distance",
-        SensorStateClass.MEASUREMENT,
-    ],
-    "LastTrackAverageSpeed": [
-        "last_track_average_speed",
-        "km/h",
-        "avespeed",
-        SENSOR_TYPE_TRACK,
-        None,
-        "mdi:speedometer",
-        SensorStateClass.MEASUREMENT,
-    ],
-    "LastTrackRidingtime": [
-        "last_track_riding_time",
-        "",
-        "ridingtime",
-        SENSOR_TYPE_TRACK,
-        None,
-        "mdi:timelapse",
-        None,
-    ],
-    "LastTrackThumb": [
-        "last_track_thumb",
-        "",
-        "track_thumb",
-        SENSOR_TYPE_TRACK,
-        None,
-        "mdi:map",
-        None,
-    ],
+def _connection_attributes(snapshot: VehicleSnapshot) -> dict[str, Any]:
+    """Return the summary attributes of the connection sensors."""
+    battery = snapshot.battery
+    motor = snapshot.motor
+    position = motor.position if motor else None
+    last_track = motor.last_track if motor else None
+    return {
+        "bmsId": (battery.bms_id if battery else None) or "N/A",
+        "latitude": (position.lat if position else None) or 0.0,
+        "longitude": (position.lng if position else None) or 0.0,
+        "gsm": (motor.gsm if motor else None) or "N/A",
+        "gps": (motor.gps if motor else None) or "N/A",
+        "time": (last_track.time if last_track else None) or 0,
+        "range": (motor.estimated_mileage if motor else None) or 0,
+        "battery": (battery.charge if battery else None) or 0,
+        "battery_grade": (battery.grade if battery else None) or 0,
+        "centre_ctrl_batt": (motor.centre_ctrl_battery if motor else None) or 0,
+    }
+
+
+def _trip_sensors(name: str, period: str) -> tuple[NiuSensorEntityDescription, ...]:
+    """Describe the ride total sensors of one period of the trip summary."""
+    return (
+        NiuSensorEntityDescription(
+            key=f"{name}Distance",
+            sensor_id=f"{period}_distance",
+            sensor_type=SENSOR_TYPE_TRIPS,
+            value_fn=_snapshot_value(f"trips.{period}.distance"),
+            unit_of_measurement="m",
+            icon="mdi:map-marker-distance",
+            state_class=SensorStateClass.TOTAL_INCREASING,
+        ),
+        NiuSensorEntityDescription(
+            key=f"{name}Rides",
+            sensor_id=f"{period}_rides",
+            sensor_type=SENSOR_TYPE_TRIPS,
+            value_fn=_snapshot_value(f"trips.{period}.count"),
+            unit_of_measurement="x",
+            icon="mdi:counter",
+            state_class=SensorStateClass.TOTAL_INCREASING,
+        ),
+        NiuSensorEntityDescription(
+            key=f"{name}RidingTime",
+            sensor_id=f"{period}_riding_time",
+            sensor_type=SENSOR_TYPE_TRIPS,
+            value_fn=_snapshot_value(f"trips.{period}.riding_time"),
+            unit_of_measurement="s",
+            icon="mdi:map-clock",
+            state_class=SensorStateClass.TOTAL_INCREASING,
+        ),
+        NiuSensorEntityDescription(
+            key=f"{name}AverageSpeed",
+            sensor_id=f"{period}_average_speed",
+            sensor_type=SENSOR_TYPE_TRIPS,
+            value_fn=_snapshot_value(f"trips.{period}.average_speed"),
+            unit_of_measurement="km/h",
+            icon="mdi:speedometer",
+            state_class=SensorStateClass.MEASUREMENT,
+        ),
+    )
+
+
+SENSOR_TYPES: dict[str, NiuSensorEntityDescription] = {
+    description.key: description
+    for description in (
+        NiuSensorEntityDescription(
+            key="BatteryCharge",
+            sensor_id="battery_charge",
+            sensor_type=SENSOR_TYPE_BAT,
+            value_fn=_snapshot_value("battery.charge"),
+            unit_of_measurement="%",
+            device_class=SensorDeviceClass.BATTERY,
+            icon="mdi:battery-charging-50",
+            state_class=SensorStateClass.MEASUREMENT,
+        ),
+        NiuSensorEntityDescription(
+            key="Isconnected",
+            sensor_id="is_connected",
+            sensor_type=SENSOR_TYPE_MOTO,
+            value_fn=_snapshot_value("motor.is_connected"),
+            unit_of_measurement="",
+            icon="mdi:connection",
+            attributes_fn=_connection_attributes,
+            extra_endpoints=frozenset({ENDPOINT_BATTERY}),
+        ),
+        NiuSensorEntityDescription(
+            key="TimesCharged",
+            sensor_id="times_charged",
+            sensor_type=SENSOR_TYPE_BAT,
+            value_fn=_snapshot_value("battery.charged_times"),
+            unit_of_measurement="x",
+            icon="mdi:battery-charging-wireless",
+            state_class=SensorStateClass.TOTAL,
+        ),
+        NiuSensorEntityDescription(
+            key="temperatureDesc",
+            sensor_id="temp_descr",
+            sensor_type=SENSOR_TYPE_BAT,
+            value_fn=_snapshot_value("battery.temperature_desc"),
+            unit_of_measurement="",
+            icon="mdi:thermometer-alert",
+        ),
+        NiuSensorEntityDescription(
+            key="Temperature",
+            sensor_id="temperature",
+            sensor_type=SENSOR_TYPE_BAT,
+            value_fn=_snapshot_value("battery.temperature"),
+            unit_of_measurement="°C",
+            device_class=SensorDeviceClass.TEMPERATURE,
+            icon="mdi:thermometer",
+            state_class=SensorStateClass.MEASUREMENT,
+        ),
+        NiuSensorEntityDescription(
+            key="BatteryGrade",
+            sensor_id="battery_grade",
+            sensor_type=SENSOR_TYPE_BAT,
+            value_fn=_snapshot_value("battery.grade"),
+            unit_of_measurement="%",
+            device_class=SensorDeviceClass.BATTERY,
+            icon="mdi:car-battery",
+            state_class=SensorStateClass.MEASUREMENT,
+        ),
+        NiuSensorEntityDescription(
+            key="CurrentSpeed",
+            sensor_id="current_speed",
+            sensor_type=SENSOR_TYPE_MOTO,
+            value_fn=_snapshot_value("motor.now_speed"),
+            unit_of_measurement="km/h",
+            icon="mdi:speedometer",
+            state_class=SensorStateClass.MEASUREMENT,
+        ),
+        NiuSensorEntityDescription(
+            key="ScooterConnected",
+            sensor_id="scooter_connected",
+            sensor_type=SENSOR_TYPE_MOTO,
+            value_fn=_snapshot_value("motor.is_connected"),
+            unit_of_measurement="",
+            icon="mdi:motorbike-electric",
+            attributes_fn=_connection_attributes,
+            extra_endpoints=frozenset({ENDPOINT_BATTERY}),
+        ),
+        NiuSensorEntityDescription(
+            key="IsCharging",
+            sensor_id="is_charging",
+            sensor_type=SENSOR_TYPE_MOTO,
+            value_fn=_snapshot_value("motor.is_charging"),
+            unit_of_measurement="",
+            icon="mdi:battery-charging",
+        ),
+        NiuSensorEntityDescription(
+            key="IsLocked",
+            sensor_id="is_locked",
+            sensor_type=SENSOR_TYPE_MOTO,
+            value_fn=_snapshot_value("motor.lock_status"),
+            unit_of_measurement="",
+            icon="mdi:lock",
+        ),
+        NiuSensorEntityDescription(
+            key="TimeLeft",
+            sensor_id="time_left",
+            sensor_type=SENSOR_TYPE_MOTO,
+            value_fn=_snapshot_value("motor.left_time"),
+            unit_of_measurement="h",
+            icon="mdi:av-timer",
+            state_class=SensorStateClass.MEASUREMENT,
+        ),
+        NiuSensorEntityDescription(
+            key="EstimatedMileage",
+            sensor_id="estimated_mileage",
+            sensor_type=SENSOR_TYPE_MOTO,
+            value_fn=_snapshot_value("motor.estimated_mileage"),
+            unit_of_measurement="km",
+            icon="mdi:map-marker-distance",
+            state_class=SensorStateClass.MEASUREMENT,
+        ),
+        NiuSensorEntityDescription(
+            key="centreCtrlBatt",
+            sensor_id="centre_ctrl_batt",
+            sensor_type=SENSOR_TYPE_MOTO,
+            value_fn=_snapshot_value("motor.centre_ctrl_battery"),
+            unit_of_measurement="%",
+            device_class=SensorDeviceClass.BATTERY,
+            icon="mdi:car-cruise-control",
+            state_class=SensorStateClass.MEASUREMENT,
+        ),
+        NiuSensorEntityDescription(
+            key="HDOP",
+            sensor_id="hdp",
+            sensor_type=SENSOR_TYPE_MOTO,
+            value_fn=_snapshot_value("motor.hdop"),
+            unit_of_measurement="",
+            icon="mdi:map-marker",
+            state_class=SensorStateClass.MEASUREMENT,
+        ),
+        NiuSensorEntityDescription(
+            key="Longitude",
+            sensor_id="long",
+            sensor_type=SENSOR_TYPE_POS,
+            value_fn=_snapshot_value("motor.position.lng"),
+            unit_of_measurement="",
+            icon="mdi:map-marker",
+            state_class=SensorStateClass.MEASUREMENT,
+            deadband=POSITION_DEADBAND,
+        ),
+        NiuSensorEntityDescription(
+            key="Latitude",
+            sensor_id="lat",
+            sensor_type=SENSOR_TYPE_POS,
+            value_fn=_snapshot_value("motor.position.lat"),
+            unit_of_measurement="",
+            icon="mdi:map-marker",
+            state_class=SensorStateClass.MEASUREMENT,
+            deadband=POSITION_DEADBAND,
+        ),
+        NiuSensorEntityDescription(
+            key="Distance",
+            sensor_id="distance",
+            sensor_type=SENSOR_TYPE_DIST,
+            value_fn=_snapshot_value("motor.last_track.distance"),
+            unit_of_measurement="m",
+            icon="mdi:map-marker-distance",
+            state_class=SensorStateClass.MEASUREMENT,
+        ),
+        NiuSensorEntityDescription(
+            key="RidingTime",
+            sensor_id="riding_time",
+            sensor_type=SENSOR_TYPE_DIST,
+            value_fn=_snapshot_value("motor.last_track.riding_time"),
+            unit_of_measurement="s",
+            icon="mdi:map-clock",
+            state_class=SensorStateClass.MEASUREMENT,
+        ),
+        NiuSensorEntityDescription(
+            key="totalMileage",
+            sensor_id="total_mileage",
+            sensor_type=SENSOR_TYPE_OVERALL,
+            value_fn=_snapshot_value("overall.total_mileage"),
+            unit_of_measurement="km",
+            icon="mdi:map-marker-distance",
+            state_class=SensorStateClass.TOTAL,
+        ),
+        NiuSensorEntityDescription(
+            key="DaysInUse",
+            sensor_id="bind_days_count",
+            sensor_type=SENSOR_TYPE_OVERALL,
+            value_fn=_snapshot_value("overall.bind_days_count"),
+            unit_of_measurement="days",
+            icon="mdi:calendar-today",
+            state_class=SensorStateClass.TOTAL,
+        ),
+        NiuSensorEntityDescription(
+            key="LastTrackStartTime",
+            sensor_id="last_track_start_time",
+            sensor_type=SENSOR_TYPE_TRACK,
+            value_fn=_snapshot_value("track.start_time"),
+            unit_of_measurement="",
+            icon="mdi:clock-start",
+        ),
+        NiuSensorEntityDescription(
+            key="LastTrackEndTime",
+            sensor_id="last_track_end_time",
+            sensor_type=SENSOR_TYPE_TRACK,
+            value_fn=_snapshot_value("track.end_time"),
+            unit_of_measurement="",
+            icon="mdi:clock-end",
+        ),
+        NiuSensorEntityDescription(
+            key="LastTrackDistance",
+            sensor_id="last_track_distance",
+            sensor_type=SENSOR_TYPE_TRACK,
+            value_fn=_snapshot_value("track.distance"),
+            unit_of_measurement="m",
+            icon="mdi:map-marker-distance",
+            state_class=SensorStateClass.MEASUREMENT,
+        ),
+        NiuSensorEntityDescription(
+            key="LastTrackAverageSpeed",
+            sensor_id="last_track_average_speed",
+            sensor_type=SENSOR_TYPE_TRACK,
+            value_fn=_snapshot_value("track.avespeed"),
+            unit_of_measurement="km/h",
+            icon="mdi:speedometer",
+            state_class=SensorStateClass.MEASUREMENT,
+        ),
+        NiuSensorEntityDescription(
+            key="LastTrackRidingtime",
+            sensor_id="last_track_riding_time",
+            sensor_type=SENSOR_TYPE_TRACK,
+            value_fn=_snapshot_value("track.ridingtime"),
+            unit_of_measurement="",
+            icon="mdi:timelapse",
+        ),
+        NiuSensorEntityDescription(
+            key="LastTrackThumb",
+            sensor_id="last_track_thumb",
+            sensor_type=SENSOR_TYPE_TRACK,
+            value_fn=_snapshot_value("track.track_thumb"),
+            unit_of_measurement="",
+            icon="mdi:map",
+        ),
+        *_trip_sensors("Today", "today"),
+        *_trip_sensors("Week", "week"),
+        *_trip_sensors("Month", "month"),
+    )
 }
 
 
@@ -286,31 +391,18 @@ async def async_setup_entry(
     coordinator = config_entry.runtime_data.coordinator
     
     # Get monitored variables from config
-    monitored_variables = config_entry.data.get(
-        CONF_MONITORED_VARIABLES, DEFAULT_MONITORED_VARIABLES
+    monitored_variables = config_entry.options.get(
+        CONF_MONITORED_VARIABLES,
+        config_entry.data.get(CONF_MONITORED_VARIABLES, DEFAULT_MONITORED_VARIABLES),
     )
     
-    # Get scooter info for device info
-    scooter_id = config_entry.data.get(CONF_SCOOTER_ID, 0)
-    
     entities = []
-    for sensor in monitored_variables:
-        if sensor in SENSOR_TYPES:
-            sensor_config = SENSOR_TYPES[sensor]
-            entities.append(
-                NiuSensor(
-                    coordinator,
-                    sensor,
-                    sensor_config[0],
-                    sensor_config[1],
-                    sensor_config[2],
-                    sensor_config[3],
-                    sensor_config[4],
-                    sensor_config[5],
-                    sensor_config[6],
-                    config_entry,
+    for vehicle in coordinator.vehicles.values():
+        for sensor in monitored_variables:
+            if sensor in SENSOR_TYPES:
+                entities.append(
+                    NiuSensor(coordinator, vehicle, SENSOR_TYPES[sensor], config_entry)
                 )
-            )
 
     async_add_entities(entities)
 
@@ -318,41 +410,60 @@ async def async_setup_entry(
 class NiuSensor(SensorEntity):
     """Representation of a NIU sensor."""
 
+    entity_description: NiuSensorEntityDescription
+
     def __init__(
         self,
         coordinator: NiuDataCoordinator,
-        sensor_name: str,
-        sensor_id: str,
-        unit_of_measurement: str,
-        id_name: str,
-        sensor_type: str,
-        device_class: SensorDeviceClass | None,
-        icon: str,
-        state_class: SensorStateClass | None,
+        vehicle: NiuVehicle,
+        description: NiuSensorEntityDescription,
         config_entry: ConfigEntry,
     ) -> None:
         """Initialize the sensor."""
         self.coordinator = coordinator
-        self._sensor_name = sensor_name
-        self._sensor_id = sensor_id
-        self._unit_of_measurement = unit_of_measurement
-        self._id_name = id_name
-        self._sensor_type = sensor_type
-        self._device_class = device_class
-        self._icon = icon
-        self._state_class = state_class
+        self.entity_description = description
         self._config_entry = config_entry
-        
+        self._vehicle = vehicle
+        # Resolved once so that reading the state is a single call
+        self._value_fn = description.value_fn
+        self._attributes_fn = description.attributes_fn
+        self._endpoint = SENSOR_TYPE_ENDPOINTS[description.sensor_type]
+        # State and attributes computed for a vehicle generation, which HA
+        # may read several times per write
+        self._state: StateType = None
+        self._state_generation = -1
+        self._attributes: dict[str, Any] | None = None
+        self._attributes_generation = -1
+        # Availability, state and attributes of the last write
+        self._written: tuple[bool, StateType, dict[str, Any] | None] | None = None
+
+        sensor_name = description.key
+        sensor_id = description.sensor_id
+
+        if coordinator.all_scooters:
+            # One entry polls the whole account, so key everything by SN
+            self._attr_unique_id = f"niu_{vehicle.sn}_{sensor_id}"
+            self._attr_name = f"NIU {vehicle.name} {sensor_name}"
+            self._attr_device_info = DeviceInfo(
+                identifiers={(DOMAIN, f"niu_{vehicle.sn}")},
+                name=f"NIU {vehicle.name}",
+                manufacturer="NIU",
+                model="Electric Scooter",
+                serial_number=vehicle.sn,
+                configuration_url="https://account.niu.com",
+            )
+            return
+
         # Get scooter ID from config
-        scooter_id = config_entry.data.get(CONF_SCOOTER_ID, 0)
-        
+        scooter_id = vehicle.scooter_id
+
         # Create unique ID with scooter ID
         self._attr_unique_id = f"niu_scooter_{scooter_id}_{sensor_id}"
         self._attr_name = f"NIU Scooter {scooter_id} {sensor_name}"
-        
+
         # Set device info with scooter ID
         self._attr_device_info = DeviceInfo(
-            identifiers={(DOMAIN, f"niu_scooter_{scooter_id}_{coordinator.sn}")},
+            identifiers={(DOMAIN, f"niu_scooter_{scooter_id}_{vehicle.sn}")},
             name=f"NIU Scooter {scooter_id}",
             manufacturer="NIU",
             model="Electric Scooter",
@@ -362,22 +473,7 @@ class NiuSensor(SensorEntity):
     @property
     def unit_of_measurement(self) -> str | None:
         """Return the unit of measurement."""
-        return self._unit_of_measurement
-
-    @property
-    def icon(self) -> str | None:
-        """Return the icon."""
-        return self._icon
-
-    @property
-    def device_class(self) -> SensorDeviceClass | None:
-        """Return the device class."""
-        return self._device_class
-
-    @property
-    def state_class(self) -> SensorStateClass | None:
-        """Return the state class."""
-        return self._state_class
+        return self.entity_description.unit_of_measurement
 
     @property
     def state(self) -> StateType:
@@ -385,103 +481,74 @@ class NiuSensor(SensorEntity):
         if self.coordinator.data is None:
             return None
 
-        raw_value = self.coordinator.get_data_by_type(self._sensor_type, self._id_name)
-
-        if self._sensor_type == SENSOR_TYPE_POS:
-            if self._id_name == "lng":
-                lng = float(raw_value) if raw_value is not None else 0.0
-                lat = float(self.coordinator.get_position_data("lat")) if self.coordinator.get_position_data("lat") is not None else 0.0
-                if lng != 0.0 and lat != 0.0:
-                    wgs84_lng, wgs84_lat = gcj02_to_wgs84(lng, lat)
-                    return wgs84_lng
-                else:
-                    _LOGGER.warning("Skipping conversion due to zero coordinates")
-            elif self._id_name == "lat":
-                lng = float(self.coordinator.get_position_data("lng")) if self.coordinator.get_position_data("lng") is not None else 0.0
-                lat = float(raw_value) if raw_value is not None else 0.0
-                if lng != 0.0 and lat != 0.0:
-                    wgs84_lng, wgs84_lat = gcj02_to_wgs84(lng, lat)
-                    return wgs84_lat
-                else:
-                    _LOGGER.warning("Skipping conversion due to zero coordinates")
-        return raw_value
+        generation = self._vehicle.generation
+        if self._state_generation != generation:
+            self._state = self._value_fn(self._vehicle.snapshot)
+            self._state_generation = generation
+        return self._state
 
     @property
     def extra_state_attributes(self) -> dict[str, Any] | None:
         """Return entity specific state attributes."""
-        if self._sensor_type == SENSOR_TYPE_MOTO and self._id_name == "isConnected":
-            lng = self.coordinator.get_position_data("lng") or 0.0
-            lat = self.coordinator.get_position_data("lat") or 0.0
-            _lng, _lat = gcj02_to_wgs84(lng, lat)
-            try:
-                return {
-                    "bmsId": self.coordinator.get_battery_data("bmsId") or "N/A",
-                    "latitude": _lat,
-                    "longitude": _lng,
-                    "gsm": self.coordinator.get_motor_data("gsm") or "N/A",
-                    "gps": self.coordinator.get_motor_data("gps") or "N/A",
-                    "time": self.coordinator.get_distance_data("time") or 0,
-                    "range": self.coordinator.get_motor_data("estimatedMileage") or 0,
-                    "battery": self.coordinator.get_battery_data("batteryCharging") or 0,
-                    "battery_grade": self.coordinator.get_battery_data("gradeBattery") or 0,
-                    "centre_ctrl_batt": self.coordinator.get_motor_data("centreCtrlBattery") or 0,
-                }
-            except Exception as e:
-                _LOGGER.warning(f"Error getting extra state attributes for {self._attr_name}: {e}")
-                return {}
-        return None
+        if self._attributes_fn is None:
+            return None
+
+        generation = self._vehicle.generation
+        if self._attributes_generation != generation:
+            self._attributes = self._attributes_fn(self._vehicle.snapshot)
+            self._attributes_generation = generation
+        return self._attributes
 
     @property
     def available(self) -> bool:
-        """Return True if entity is available."""
-        return self.coordinator.last_update_success
+        """Return True if entity is available.
+
+        Stale data of the sensor's endpoint is shown while it is refetched;
+        only once it has expired does the sensor become unavailable.
+        """
+        return self.coordinator.last_update_success and self._vehicle.cache.is_servable(
+            self._endpoint, dt_util.utcnow()
+        )
 
     async def async_added_to_hass(self) -> None:
         """When entity is added to hass."""
         await super().async_added_to_hass()
         self.async_on_remove(
-            self.coordinator.async_add_listener(self.async_write_ha_state)
+            self.coordinator.async_add_listener(self._handle_coordinator_update)
+        )
+        self.async_on_remove(
+            self.coordinator.async_register_endpoints(
+                self._vehicle.sn, self._required_endpoints()
+            )
         )
 
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Write the state after a refresh if anything visible changed."""
+        current = (self.available, self.state, self.extra_state_attributes)
+        if self._written is not None and not self._has_changed(self._written, current):
+            return
+        self._written = current
+        self.async_write_ha_state()
+
+    def _has_changed(
+        self,
+        written: tuple[bool, StateType, dict[str, Any] | None],
+        current: tuple[bool, StateType, dict[str, Any] | None],
+    ) -> bool:
+        """Return whether the current values differ from the last write."""
+        if written[0] != current[0] or written[2] != current[2]:
+            return True
+        old, new = written[1], current[1]
+        deadband = self.entity_description.deadband
+        if (
+            deadband is not None
+            and isinstance(old, (int, float))
+            and isinstance(new, (int, float))
+        ):
+            return abs(new - old) >= deadband
+        return old != new
 
-def gcj02_to_wgs84(lng, lat):
-    lat = float(lat)
-    lng = float(lng)
-
-    if out_of_china(lng, lat):
-        return [lng, lat]
-    else:
-        dlat = transformlat(lng - 105.0, lat - 35.0)
-        dlng = transformlng(lng - 105.0, lat - 35.0)
-        radlat = lat / 180.0 * PI
-        magic = math.sin(radlat)
-        magic = 1 - ee * magic * magic
-        sqrtmagic = math.sqrt(magic)
-        dlat = (dlat * 180.0) / ((a * (1 - ee)) / (magic * sqrtmagic) * PI)
-        dlng = (dlng * 180.0) / (a / sqrtmagic * math.cos(radlat) * PI)
-        mglat = lat + dlat
-        mglng = lng + dlng
-        return lng * 2 - mglng, lat * 2 - mglat
-
-def out_of_china(lng, lat):
-    lat = float(lat)
-    lng = float(lng)
-    return not (lng > 73.66 and lng < 135.05 and lat > 3.86 and lat < 53.55)
-
-def transformlat(lng, lat):
-    lat = float(lat)
-    lng = float(lng)
-    ret = -100.0 + 2.0 * lng + 3.0 * lat + 0.2 * lat * lat + 0.1 * lng * lat + 0.2 * math.sqrt(abs(lng))
-    ret += (20.0 * math.sin(6.0 * lng * PI) + 20.0 * math.sin(2.0 * lng * PI)) * 2.0 / 3.0
-    ret += (20.0 * math.sin(lat * PI) + 40.0 * math.sin(lat / 3.0 * PI)) * 2.0 / 3.0
-    ret += (160.0 * math.sin(lat / 12.0 * PI) + 320 * math.sin(lat * PI / 30.0)) * 2.0 / 3.0
-    return ret
-
-def transformlng(lng, lat):
-    lat = float(lat)
-    lng = float(lng)
-    ret = 300.0 + lng + 2.0 * lat + 0.1 * lng * lng + 0.1 * lng * lat + 0.1 * math.sqrt(abs(lng))
-    ret += (20.0 * math.sin(6.0 * lng * PI) + 20.0 * math.sin(2.0 * lng * PI)) * 2.0 / 3.0
-    ret += (20.0 * math.sin(lng * PI) + 40.0 * math.sin(lng / 3.0 * PI)) * 2.0 / 3.0
-    ret += (150.0 * math.sin(lng / 12.0 * PI) + 300.0 * math.sin(lng / 30.0 * PI)) * 2.0 / 3.0
-    return ret
+    def _required_endpoints(self) -> set[str]:
+        """Return the endpoints this sensor reads its state and attributes from."""
+        return {self._endpoint} | self.entity_description.extra_endpoints
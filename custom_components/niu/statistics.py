@@ -0,0 +1,149 @@
+"""Import of NIU ride history into long-term statistics."""
+
+from __future__ import annotations
+
+from collections.abc import Iterable
+import logging
+
+from homeassistant.components.recorder import get_instance
+from homeassistant.components.recorder.models import (
+    StatisticData,
+    StatisticMeanType,
+    StatisticMetaData,
+)
+from homeassistant.components.recorder.statistics import (
+    async_add_external_statistics,
+    get_last_statistics,
+)
+from homeassistant.const import UnitOfLength, UnitOfSpeed, UnitOfTime
+from homeassistant.core import HomeAssistant
+from homeassistant.util import dt as dt_util, slugify
+from homeassistant.util.unit_conversion import (
+    DistanceConverter,
+    DurationConverter,
+    SpeedConverter,
+)
+
+from .const import DOMAIN
+from .tracks import TrackRecord
+
+_LOGGER = logging.getLogger(__name__)
+
+# Rows handed to the recorder per job
+STATISTICS_BATCH = 1000
+
+HOUR = 3600
+
+
+def ride_statistic_id(sn: str, key: str) -> str:
+    """Return the external statistic ID of a scooter's ride metric."""
+    return f"{DOMAIN}:{slugify(sn)}_{key}"
+
+
+async def async_import_ride_statistics(
+    hass: HomeAssistant, sn: str, name: str, tracks: Iterable[TrackRecord]
+) -> None:
+    """Import rides into hourly distance, riding time and speed statistics.
+
+    Every ride is counted in the hour it started. Sums are computed over the
+    whole local history, so only the hours from the last imported one on
+    need to be written; that hour is rewritten in case a ride was added to
+    it since.
+    """
+    distance_id = ride_statistic_id(sn, "ride_distance")
+    riding_time_id = ride_statistic_id(sn, "riding_time")
+    speed_id = ride_statistic_id(sn, "ride_speed")
+
+    last = await get_instance(hass).async_add_executor_job(
+        get_last_statistics, hass, 1, distance_id, False, {"sum"}
+    )
+    resume = last[distance_id][0]["start"] if last.get(distance_id) else None
+
+    distance_rows: list[StatisticData] = []
+    riding_time_rows: list[StatisticData] = []
+    speed_rows: list[StatisticData] = []
+    distance_sum = 0.0
+    riding_time_sum = 0.0
+    for hour, rides in _hourly(tracks):
+        distance = sum(float(ride.distance or 0) for ride in rides)
+        riding_time = sum(float(ride.ridingtime or 0) for ride in rides)
+        distance_sum += distance
+        riding_time_sum += riding_time
+        if resume is not None and hour < resume:
+            continue
+
+        start = dt_util.utc_from_timestamp(hour)
+        distance_rows.append(StatisticData(start=start, state=distance, sum=distance_sum))
+        riding_time_rows.append(
+            StatisticData(start=start, state=riding_time, sum=riding_time_sum)
+        )
+        speeds = [float(ride.avespeed) for ride in rides if ride.avespeed is not None]
+        if speeds:
+            speed_rows.append(
+                StatisticData(
+                    start=start,
+                    mean=sum(speeds) / len(speeds),
+                    min=min(speeds),
+                    max=max(speeds),
+                )
+            )
+
+    distance_metadata = _metadata(
+        distance_id,
+        f"{name} ride distance",
+        DistanceConverter.UNIT_CLASS,
+        UnitOfLength.METERS,
+        has_sum=True,
+    )
+    riding_time_metadata = _metadata(
+        riding_time_id,
+        f"{name} riding time",
+        DurationConverter.UNIT_CLASS,
+        UnitOfTime.SECONDS,
+        has_sum=True,
+    )
+    speed_metadata = _metadata(
+        speed_id,
+        f"{name} ride speed",
+        SpeedConverter.UNIT_CLASS,
+        UnitOfSpeed.KILOMETERS_PER_HOUR,
+        has_sum=False,
+    )
+    for metadata, rows in (
+        (distance_metadata, distance_rows),
+        (riding_time_metadata, riding_time_rows),
+        (speed_metadata, speed_rows),
+    ):
+        for first in range(0, len(rows), STATISTICS_BATCH):
+            async_add_external_statistics(
+                hass, metadata, rows[first:first + STATISTICS_BATCH]
+            )
+
+    _LOGGER.debug("Imported %d hours of ride statistics of %s", len(distance_rows), sn)
+
+
+def _hourly(tracks: Iterable[TrackRecord]) -> list[tuple[int, list[TrackRecord]]]:
+    """Group rides, oldest first, by the hour they started in."""
+    hours: list[tuple[int, list[TrackRecord]]] = []
+    for track in tracks:
+        hour = track.start_time // 1000 // HOUR * HOUR
+        if hours and hours[-1][0] == hour:
+            hours[-1][1].append(track)
+        else:
+            hours.append((hour, [track]))
+    return hours
+
+
+def _metadata(
+    statistic_id: str, name: str, unit_class: str, unit: str, *, has_sum: bool
+) -> StatisticMetaData:
+    """Return the metadata of a ride statistic."""
+    return StatisticMetaData(
+        mean_type=StatisticMeanType.NONE if has_sum else StatisticMeanType.ARITHMETIC,
+        has_sum=has_sum,
+        name=name,
+        source=DOMAIN,
+        statistic_id=statistic_id,
+        unit_class=unit_class,
+        unit_of_measurement=unit,
+    )
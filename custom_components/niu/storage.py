@@ -0,0 +1,77 @@
+"""Persistent storage for the NIU integration."""
+
+from __future__ import annotations
+
+import asyncio
+from typing import Any
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.storage import Store
+
+from .api import NiuToken
+from .const import DATA_AUTH_STORE, DOMAIN
+
+AUTH_STORAGE_VERSION = 1
+AUTH_STORAGE_KEY = f"{DOMAIN}.auth"
+AUTH_SAVE_DELAY = 1
+
+
+class NiuAuthStore:
+    """Cache access tokens and resolved serial numbers per NIU account.
+
+    With a cached token and serial number, a restart does not need to log in
+    or list the account's vehicles before the first data fetch.
+    """
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        """Initialize the store."""
+        self._store: Store[dict[str, Any]] = Store(
+            hass, AUTH_STORAGE_VERSION, AUTH_STORAGE_KEY, private=True
+        )
+        self._data: dict[str, Any] | None = None
+        self._load_lock = asyncio.Lock()
+
+    async def _async_account(self, username: str) -> dict[str, Any]:
+        """Return the stored data of an account, loading the store once."""
+        async with self._load_lock:
+            if self._data is None:
+                self._data = await self._store.async_load() or {}
+        return self._data.setdefault(username, {})
+
+    @callback
+    def _async_schedule_save(self) -> None:
+        """Write the store to disk shortly."""
+        self._store.async_delay_save(lambda: self._data or {}, AUTH_SAVE_DELAY)
+
+    async def async_get_token(self, username: str) -> NiuToken | None:
+        """Return the cached token of an account."""
+        account = await self._async_account(username)
+        if not account.get("token"):
+            return None
+        return NiuToken.from_dict(account["token"])
+
+    async def async_set_token(self, username: str, token: NiuToken | None) -> None:
+        """Cache the token of an account, or forget it when None."""
+        account = await self._async_account(username)
+        account["token"] = token.as_dict() if token is not None else None
+        self._async_schedule_save()
+
+    async def async_get_sn(self, username: str, scooter_id: int) -> str | None:
+        """Return the cached serial number of a scooter."""
+        account = await self._async_account(username)
+        return account.get("sn_ids", {}).get(str(scooter_id))
+
+    async def async_set_sn(self, username: str, scooter_id: int, sn: str) -> None:
+        """Cache the serial number of a scooter."""
+        account = await self._async_account(username)
+        account.setdefault("sn_ids", {})[str(scooter_id)] = sn
+        self._async_schedule_save()
+
+
+@callback
+def async_get_auth_store(hass: HomeAssistant) -> NiuAuthStore:
+    """Return the auth store shared by all NIU entries."""
+    domain_data = hass.data.setdefault(DOMAIN, {})
+    if DATA_AUTH_STORE not in domain_data:
+        domain_data[DATA_AUTH_STORE] = NiuAuthStore(hass)
+    return domain_data[DATA_AUTH_STORE]
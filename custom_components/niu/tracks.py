@@ -0,0 +1,200 @@
+"""Local ride history of NIU scooters."""
+
+from __future__ import annotations
+
+import asyncio
+from collections.abc import AsyncIterator, Callable
+from contextlib import aclosing
+from dataclasses import astuple, dataclass
+from datetime import date
+import logging
+from typing import Any
+
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.storage import Store
+from homeassistant.util import dt as dt_util
+
+from .const import DOMAIN, TRACK_BACKFILL_PAGE_SIZE
+
+_LOGGER = logging.getLogger(__name__)
+
+TRACK_STORAGE_VERSION = 1
+TRACK_SAVE_DELAY = 10
+
+
+def local_day_ms(day: date) -> int:
+    """Return the start of a local day in epoch milliseconds, as ride times are."""
+    return int(dt_util.start_of_local_day(day).timestamp() * 1000)
+
+
+@dataclass(frozen=True, slots=True)
+class TrackRecord:
+    """Summary of one ride, as kept in the local history."""
+
+    start_time: int
+    end_time: int | None
+    distance: float | None
+    avespeed: float | None
+    ridingtime: int | None
+    track_id: str | None
+
+    @classmethod
+    def from_api(cls, track: dict[str, Any]) -> TrackRecord:
+        """Build a record from an item of the track list."""
+        return cls(
+            start_time=int(track["startTime"]),
+            end_time=track.get("endTime"),
+            distance=track.get("distance"),
+            avespeed=track.get("avespeed"),
+            ridingtime=track.get("ridingtime"),
+            track_id=track.get("trackId"),
+        )
+
+    def as_row(self) -> list[Any]:
+        """Return the record as a compact storage row."""
+        return list(astuple(self))
+
+
+class NiuTrackHistory:
+    """Ride history of one scooter, kept in its own store.
+
+    The first sync stores the newest rides; the older ones are then
+    backfilled a few pages at a time. Afterwards only rides newer than the
+    newest stored one are fetched.
+    """
+
+    def __init__(self, hass: HomeAssistant, sn: str) -> None:
+        """Initialize the history."""
+        self.sn = sn
+        self._store: Store[dict[str, Any]] = Store(
+            hass, TRACK_STORAGE_VERSION, f"{DOMAIN}.tracks.{sn}"
+        )
+        # Oldest ride first
+        self._tracks: list[TrackRecord] | None = None
+        # Rides of the track list walked by the backfill, newest first, while
+        # older ones are left to download
+        self._backfill_offset: int | None = None
+        # The coordinator and the export service may sync at the same time
+        self._sync_lock = asyncio.Lock()
+
+    async def async_load(self) -> list[TrackRecord]:
+        """Return the stored rides, loading them on first use."""
+        if self._tracks is None:
+            data = await self._store.async_load() or {}
+            self._tracks = [TrackRecord(*row) for row in data.get("tracks", [])]
+            self._backfill_offset = data.get("backfill_offset")
+        return self._tracks
+
+    @property
+    def backfilling(self) -> bool:
+        """Return whether older rides are still to be downloaded."""
+        return self._backfill_offset is not None
+
+    @property
+    def last_start_time(self) -> int | None:
+        """Return the start time of the newest stored ride."""
+        if not self._tracks:
+            return None
+        return self._tracks[-1].start_time
+
+    async def async_sync(
+        self, pages: AsyncIterator[dict[str, Any]]
+    ) -> dict[str, Any] | None:
+        """Store the new rides of a track list, newest page first.
+
+        Pages are consumed until one reaches a ride that is already stored.
+        Nothing is stored unless the walk completes, which keeps the history
+        free of gaps. An empty history only takes the first page and leaves
+        the older rides to ``async_backfill``. Returns the first page, or
+        None if there was none. Concurrent syncs run one after the other, so
+        the later one only sees what the earlier one did not store.
+        """
+        async with self._sync_lock:
+            await self.async_load()
+            last_start_time = self.last_start_time
+            first_sync = last_start_time is None and self._backfill_offset is None
+            first_page = None
+            new_tracks: dict[int, TrackRecord] = {}
+
+            async with aclosing(pages):
+                async for page in pages:
+                    if first_page is None:
+                        first_page = page
+                    items = page.get("data") or []
+                    records = [TrackRecord.from_api(item) for item in items]
+                    fresh = [
+                        record
+                        for record in records
+                        if last_start_time is None
+                        or record.start_time > last_start_time
+                    ]
+                    for record in fresh:
+                        new_tracks[record.start_time] = record
+                    if first_sync:
+                        if records:
+                            self._backfill_offset = 0
+                        break
+                    if len(fresh) < len(records):
+                        break
+
+            if new_tracks:
+                _LOGGER.debug("Stored %d new tracks of %s", len(new_tracks), self.sn)
+                self._tracks.extend(
+                    sorted(new_tracks.values(), key=lambda t: t.start_time)
+                )
+                if self._backfill_offset is not None:
+                    # The new rides moved the ones left to backfill down the list
+                    self._backfill_offset += len(new_tracks)
+                self._store.async_delay_save(self._data_to_save, TRACK_SAVE_DELAY)
+            return first_page
+
+    async def async_backfill(
+        self,
+        iter_pages: Callable[[int, int], AsyncIterator[dict[str, Any]]],
+        max_pages: int | None = None,
+    ) -> None:
+        """Store the rides older than the oldest stored one.
+
+        ``iter_pages`` yields the track list from a page index at a page
+        size. At most ``max_pages`` pages are walked; each is stored as it
+        arrives, so an interrupted backfill resumes where it stopped.
+        """
+        async with self._sync_lock:
+            tracks = await self.async_load()
+            if self._backfill_offset is None:
+                return
+            # Start a page early, in case rides were deleted since
+            index = max(self._backfill_offset // TRACK_BACKFILL_PAGE_SIZE - 1, 0)
+            walked = 0
+
+            async with aclosing(iter_pages(index, TRACK_BACKFILL_PAGE_SIZE)) as pages:
+                async for page in pages:
+                    items = page.get("data") or []
+                    oldest = tracks[0].start_time if tracks else None
+                    older = {
+                        record.start_time: record
+                        for record in map(TrackRecord.from_api, items)
+                        if oldest is None or record.start_time < oldest
+                    }
+                    tracks[:0] = sorted(older.values(), key=lambda t: t.start_time)
+                    index += 1
+                    walked += 1
+                    if len(items) < TRACK_BACKFILL_PAGE_SIZE:
+                        self._backfill_offset = None
+                        _LOGGER.debug(
+                            "Backfilled the history of %s, %d tracks",
+                            self.sn,
+                            len(tracks),
+                        )
+                    else:
+                        self._backfill_offset = index * TRACK_BACKFILL_PAGE_SIZE
+                    self._store.async_delay_save(self._data_to_save, TRACK_SAVE_DELAY)
+                    if max_pages is not None and walked >= max_pages:
+                        break
+
+    def _data_to_save(self) -> dict[str, Any]:
+        """Return the history in storage form."""
+        return {
+            "tracks": [track.as_row() for track in self._tracks or []],
+            "backfill_offset": self._backfill_offset,
+        }
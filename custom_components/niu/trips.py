@@ -0,0 +1,139 @@
+"""Running ride totals of NIU scooters per day, week and month."""
+
+from __future__ import annotations
+
+from bisect import bisect_right
+from datetime import datetime, timedelta
+import logging
+from typing import Any
+
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.storage import Store
+from homeassistant.util import dt as dt_util
+
+from .const import DOMAIN
+from .models import TripSummary, TripTotals
+from .tracks import TrackRecord, local_day_ms
+
+_LOGGER = logging.getLogger(__name__)
+
+TRIPS_STORAGE_VERSION = 1
+TRIPS_SAVE_DELAY = 10
+
+PERIOD_TODAY = "today"
+PERIOD_WEEK = "week"
+PERIOD_MONTH = "month"
+
+
+def _period_starts(moment: datetime) -> dict[str, int]:
+    """Return the start of the local day, week and month of a moment."""
+    day = dt_util.as_local(moment).date()
+    return {
+        PERIOD_TODAY: local_day_ms(day),
+        PERIOD_WEEK: local_day_ms(day - timedelta(days=day.weekday())),
+        PERIOD_MONTH: local_day_ms(day.replace(day=1)),
+    }
+
+
+class NiuTripAggregator:
+    """Ride totals of one scooter, kept in its own store.
+
+    Every period holds its start and the totals of the rides since. A new
+    ride is added to the periods it falls in, or starts them afresh if it
+    is the first ride of a new period, so each ride costs the same however
+    long the history is. Periods that ended without a newer ride read as
+    empty.
+    """
+
+    def __init__(self, hass: HomeAssistant, sn: str) -> None:
+        """Initialize the aggregator."""
+        self.sn = sn
+        self._store: Store[dict[str, Any]] = Store(
+            hass, TRIPS_STORAGE_VERSION, f"{DOMAIN}.trips.{sn}"
+        )
+        # Period -> (start in epoch milliseconds, totals since)
+        self._periods: dict[str, tuple[int, TripTotals]] = {
+            period: (0, TripTotals())
+            for period in (PERIOD_TODAY, PERIOD_WEEK, PERIOD_MONTH)
+        }
+        # Start time of the newest ride counted
+        self._counted_until: int | None = None
+        self._loaded = False
+
+    async def async_load(self) -> None:
+        """Load the stored totals on first use."""
+        if self._loaded:
+            return
+        data = await self._store.async_load() or {}
+        self._counted_until = data.get("counted_until")
+        for period, (start, count, distance, riding_time) in data.get(
+            "periods", {}
+        ).items():
+            self._periods[period] = (start, TripTotals(count, distance, riding_time))
+        self._loaded = True
+
+    async def async_add_new(self, tracks: list[TrackRecord], now: datetime) -> None:
+        """Count the rides of a history, oldest first, not counted yet.
+
+        Without stored totals only the rides of the current periods are
+        counted.
+        """
+        await self.async_load()
+        floor = self._counted_until
+        if floor is None:
+            floor = min(_period_starts(now).values()) - 1
+        first = bisect_right(tracks, floor, key=lambda track: track.start_time)
+        for track in tracks[first:]:
+            self._add(track)
+
+        counted_until = max(floor, tracks[-1].start_time) if tracks else floor
+        if counted_until != self._counted_until:
+            if first < len(tracks):
+                _LOGGER.debug(
+                    "Counted %d new tracks of %s", len(tracks) - first, self.sn
+                )
+            self._counted_until = counted_until
+            self._store.async_delay_save(self._data_to_save, TRIPS_SAVE_DELAY)
+
+    def summary(self, now: datetime) -> TripSummary | None:
+        """Return the totals of the periods ``now`` falls in.
+
+        Returns None until the stored totals are loaded.
+        """
+        if not self._loaded:
+            return None
+        starts = _period_starts(now)
+        return TripSummary(
+            **{
+                period: totals if start == starts[period] else TripTotals()
+                for period, (start, totals) in self._periods.items()
+            }
+        )
+
+    def _add(self, track: TrackRecord) -> None:
+        """Add one ride to the periods it started in."""
+        starts = _period_starts(dt_util.utc_from_timestamp(track.start_time / 1000))
+        for period, start in starts.items():
+            current_start, totals = self._periods[period]
+            if start < current_start:
+                continue
+            if start > current_start:
+                totals = TripTotals()
+            self._periods[period] = (
+                start,
+                TripTotals(
+                    count=totals.count + 1,
+                    distance=totals.distance + float(track.distance or 0),
+                    riding_time=totals.riding_time + float(track.ridingtime or 0),
+                ),
+            )
+
+    def _data_to_save(self) -> dict[str, Any]:
+        """Return the totals in storage form."""
+        return {
+            "counted_until": self._counted_until,
+            "periods": {
+                period: [start, totals.count, totals.distance, totals.riding_time]
+                for period, (start, totals) in self._periods.items()
+            },
+        }
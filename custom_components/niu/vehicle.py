@@ -0,0 +1,161 @@
+"""Per-scooter state kept by the NIU coordinator."""
+
+from __future__ import annotations
+
+from collections import Counter
+from collections.abc import Iterable
+from dataclasses import replace
+from datetime import datetime, timedelta
+import logging
+from typing import Any
+
+from .cache import EndpointCache
+from .const import (
+    ENDPOINT_BATTERY,
+    ENDPOINT_MOTOR,
+    ENDPOINT_OVERALL,
+    ENDPOINT_TRACK,
+)
+from .models import (
+    BatterySnapshot,
+    MotorSnapshot,
+    OverallSnapshot,
+    TrackSnapshot,
+    TripSummary,
+    VehicleSnapshot,
+)
+from .resilience import CircuitBreaker
+from .scheduler import EndpointScheduler, PollingMode, RideModeTracker
+
+_LOGGER = logging.getLogger(__name__)
+
+# Hysteresis of the ride-aware polling mode
+ACTIVE_MODE_HOLD = timedelta(minutes=3)
+PARKED_MODE_DELAY = timedelta(minutes=10)
+
+# Endpoints whose data only changes while the scooter is in use
+PARKED_ENDPOINTS = (ENDPOINT_BATTERY, ENDPOINT_MOTOR, ENDPOINT_TRACK)
+
+# The track list is refetched when the motor data reports a new last ride,
+# so whoever needs the track list also needs the motor data
+ENDPOINT_DEPENDENCIES = {ENDPOINT_TRACK: ENDPOINT_MOTOR}
+
+
+class NiuVehicle:
+    """One scooter: its latest snapshot, schedule and ride mode."""
+
+    def __init__(
+        self,
+        sn: str,
+        scooter_id: int,
+        name: str | None,
+        base_intervals: dict[str, timedelta],
+        active_interval: timedelta,
+        parked_interval: timedelta,
+        stagger: bool = False,
+    ) -> None:
+        """Initialize the vehicle."""
+        self.sn = sn
+        self.scooter_id = scooter_id
+        self.name = name or f"Scooter {scooter_id}"
+        self.snapshot = VehicleSnapshot()
+        # Bumped whenever the snapshot is replaced, so readers can cache
+        # values derived from it
+        self.generation = 0
+
+        # Per-endpoint age and outcome of the fetched data
+        self.cache = EndpointCache(base_intervals)
+        # Calls to an endpoint that keeps failing are held back
+        self.breakers = {endpoint: CircuitBreaker() for endpoint in base_intervals}
+
+        # Each endpoint is polled on its own cadence, which the ride mode
+        # shortens while riding and stretches while parked
+        self._base_intervals = base_intervals
+        self._active_interval = active_interval
+        self._parked_interval = parked_interval
+        self.scheduler = EndpointScheduler(base_intervals, sn if stagger else None)
+        self.scheduler.set_active(())
+        self.ride_mode = RideModeTracker(ACTIVE_MODE_HOLD, PARKED_MODE_DELAY)
+
+        # Number of entities that need each endpoint; only these are fetched
+        self._endpoint_users: Counter[str] = Counter()
+
+    def add_endpoint_users(self, endpoints: Iterable[str]) -> set[str]:
+        """Register users of the given endpoints; return the newly needed ones."""
+        endpoints = _with_dependencies(endpoints)
+        missing = endpoints - set(self._endpoint_users)
+        self._endpoint_users.update(endpoints)
+        self.scheduler.set_active(self._endpoint_users)
+        return missing
+
+    def remove_endpoint_users(self, endpoints: Iterable[str]) -> None:
+        """Release users registered with ``add_endpoint_users``."""
+        self._endpoint_users.subtract(_with_dependencies(endpoints))
+        self._endpoint_users = +self._endpoint_users
+        self.scheduler.set_active(self._endpoint_users)
+
+    def set_payload(self, endpoint: str, data: dict[str, Any], now: datetime) -> None:
+        """Parse a successful response of an endpoint into the snapshot.
+
+        Raises KeyError, TypeError or ValueError if the response is malformed,
+        in which case the previous snapshot is kept.
+        """
+        if endpoint == ENDPOINT_BATTERY:
+            snapshot = replace(self.snapshot, battery=BatterySnapshot.from_payload(data))
+        elif endpoint == ENDPOINT_MOTOR:
+            motor = MotorSnapshot.from_payload(data)
+            snapshot = replace(self.snapshot, motor=motor)
+            previous = self.snapshot.motor
+            if (
+                previous is not None
+                and motor is not None
+                and motor.last_track != previous.last_track
+            ):
+                # A ride ended since the last poll; the track list interval
+                # is only a safety net
+                _LOGGER.debug("New last track of %s, refreshing track list", self.sn)
+                self.scheduler.mark_due(ENDPOINT_TRACK)
+            if self.ride_mode.update(data.get("data") or {}, now):
+                self._apply_polling_mode()
+        elif endpoint == ENDPOINT_OVERALL:
+            snapshot = replace(self.snapshot, overall=OverallSnapshot.from_payload(data))
+        elif endpoint == ENDPOINT_TRACK:
+            snapshot = replace(self.snapshot, track=TrackSnapshot.from_payload(data))
+        else:
+            raise KeyError(endpoint)
+        self.snapshot = snapshot
+        self.generation += 1
+        self.cache.record(endpoint, now)
+
+    def set_trips(self, trips: TripSummary | None) -> None:
+        """Replace the ride totals of the snapshot if they changed."""
+        if trips == self.snapshot.trips:
+            return
+        self.snapshot = replace(self.snapshot, trips=trips)
+        self.generation += 1
+
+    def set_error(self, endpoint: str, err: Exception) -> None:
+        """Record a failed fetch; the previous snapshot is kept."""
+        self.cache.record_error(endpoint, err)
+
+    def _apply_polling_mode(self) -> None:
+        """Adjust endpoint intervals to the current ride mode."""
+        mode = self.ride_mode.mode
+        _LOGGER.debug("Switching %s to %s polling", self.sn, mode)
+        for endpoint, interval in self._base_intervals.items():
+            if mode is PollingMode.ACTIVE and endpoint == ENDPOINT_MOTOR:
+                interval = min(interval, self._active_interval)
+            elif mode is PollingMode.PARKED and endpoint in PARKED_ENDPOINTS:
+                interval = max(interval, self._parked_interval)
+            self.scheduler.set_interval(endpoint, interval)
+            self.cache.set_ttl(endpoint, interval)
+
+
+def _with_dependencies(endpoints: Iterable[str]) -> set[str]:
+    """Return the endpoints together with the endpoints they depend on."""
+    endpoints = set(endpoints)
+    return endpoints | {
+        ENDPOINT_DEPENDENCIES[endpoint]
+        for endpoint in endpoints
+        if endpoint in ENDPOINT_DEPENDENCIES
+    }